@@ -1,27 +1,38 @@
+import gc
+
+import click
 from dotenv import load_dotenv
 from flask import Flask, jsonify
+from flask.cli import with_appcontext
 from flask_jwt_extended import JWTManager
 from flask_restful import Api
 from marshmallow import ValidationError
-from flask_uploads import configure_uploads, patch_request_class
+from flask_uploads import configure_uploads
+from sqlalchemy.orm import configure_mappers
 
+from db import db
+from libs.blocklist_cache import blocklist_cache
+from libs.catalog_search import catalog_index
+from libs.db_routing import init_replica_routing, sync_sqlite_replica
 from libs.image_helper import IMAGE_SET
+from libs.image_store import image_store
+from libs.image_upload import UploadRequest
+from libs.metrics import init_metrics
+from libs.unit_of_work import init_unit_of_work
+from ma import ma
+from migrate import migrate
 from models.blocklist_model import BlockListModel
-from resources.address import UserAddress, AddressList
-from resources.image import UserAvatar, DeleteAvatarImage, ItemImage, DeleteItemImage
-from resources.item import RegisterItem, ItemList, UpdateItem, DeleteItem
+from resources.address import UserAddress, AddressList, AddressExport
+from resources.analytics import SalesAnalytics
+from resources.dispatch import Dispatch
+from resources.image import UserAvatar, DeleteAvatarImage, ItemImage, DeleteItemImage, ImageFile
+from resources.item import RegisterItem, ItemList, UpdateItem, DeleteItem, ItemSearch
+from resources.metrics import Metrics
 from resources.order import Order, OrdersList, UpdateOrder, DeleteOrder, OrderIsPacked, OrderIsShipped, \
-    OrderIsDelivered, UserOrders
-from resources.user import RegisterUser, UserLogin, RefreshToken, UserLogout, User, UsersList
+    OrderIsDelivered, UserOrders, OrdersExport, OrdersStatus, OrderLine, RevenueReport
+from resources.user import RegisterUser, UserLogin, RefreshToken, UserLogout, User, UsersList, UsersExport
 
-app = Flask(__name__)
-load_dotenv('.env', verbose=True)
-app.config.from_object("default_config")
-app.config.from_envvar("APPLICATION_SETTINGS")
-api = Api(app)
-jwt = JWTManager(app)
-configure_uploads(app, IMAGE_SET)
-patch_request_class(app, 10*1024*1024)
+jwt = JWTManager()
 
 
 @jwt.additional_claims_loader
@@ -34,45 +45,109 @@ def adding_admin_claim(identity):
 
 @jwt.token_in_blocklist_loader
 def handle_block_jti(_, jwt_payload):
-    jti = jwt_payload['jti']
-    token = BlockListModel.find_jti(jti)
-    return token is not None
+    return blocklist_cache.contains(jwt_payload['jti'])
+
+
+@click.command('compact-blocklist')
+@with_appcontext
+def compact_blocklist():
+    """Delete block_list rows whose tokens have expired."""
+    deleted = BlockListModel.delete_expired()
+    db.session.commit()
+    click.echo(f"deleted {deleted} expired blocklist entries")
 
 
-@app.errorhandler(ValidationError)
 def handle_validation(error):
-    return jsonify(error.messages)
-
-
-# user routes
-api.add_resource(RegisterUser, '/user/register')  # post
-api.add_resource(UserLogin, '/user/login')  # post
-api.add_resource(RefreshToken, '/user/refresh')  # get
-api.add_resource(UserLogout, '/user/logout')  # get
-api.add_resource(UserAddress, '/user/address')  # post
-api.add_resource(User, '/user')  # for getting user data & updating user data (get , put)
-api.add_resource(UserAvatar, '/user/avatar')  # post
-api.add_resource(DeleteAvatarImage, '/user/avatar/delete/<string:path>')  # delete
-api.add_resource(Order, '/user/order')  # post
-api.add_resource(UpdateOrder, '/user/order/update/<int:order_id>')  # put
-api.add_resource(DeleteOrder, '/user/order/delete/<int:order_id>')  # delete
-api.add_resource(UserOrders, '/user/orders')  # get
-
-
-# admin routes
-api.add_resource(RegisterItem, '/admin/item/register')  # post
-api.add_resource(UpdateItem, '/admin/item/update/<int:item_id>')  # put
-api.add_resource(DeleteItem, '/admin/item/delete/<int:item_id>')  # delete
-api.add_resource(ItemImage, '/admin/item/image/<int:item_id>')  # post
-api.add_resource(DeleteItemImage, '/admin/image/delete/<int:item_id>/<string:img_name>')  # delete
-api.add_resource(UsersList, '/admin/users')  # get
-api.add_resource(AddressList, '/admin/users/addresses')  # get
-api.add_resource(ItemList, '/admin/items')  # get
-api.add_resource(OrdersList, '/admin/orders')  # get
-api.add_resource(OrderIsPacked, '/admin/order/packed/<int:order_id>')  # get
-api.add_resource(OrderIsShipped, '/admin/order/shipped/<int:order_id>')  # get
-api.add_resource(OrderIsDelivered, '/admin/order/delivered/<int:order_id>')  # get
-
-
-# if __name__ == '__main__':
-app.run(port=5000)
+    return jsonify(error.messages), 400
+
+
+def register_routes(api: Api) -> None:
+    # user routes
+    api.add_resource(RegisterUser, '/user/register')  # post
+    api.add_resource(UserLogin, '/user/login')  # post
+    api.add_resource(RefreshToken, '/user/refresh')  # get
+    api.add_resource(UserLogout, '/user/logout')  # get
+    api.add_resource(UserAddress, '/user/address')  # post
+    api.add_resource(User, '/user')  # for getting user data & updating user data (get , put)
+    api.add_resource(UserAvatar, '/user/avatar')  # post
+    api.add_resource(DeleteAvatarImage, '/user/avatar/delete/<string:path>')  # delete
+    api.add_resource(Order, '/user/order')  # post
+    api.add_resource(UpdateOrder, '/user/order/update/<int:order_id>')  # put
+    api.add_resource(OrderLine, '/user/order/<int:order_id>/item/<int:item_id>')  # patch
+    api.add_resource(DeleteOrder, '/user/order/delete/<int:order_id>')  # delete
+    api.add_resource(UserOrders, '/user/orders')  # get
+
+    api.add_resource(ItemSearch, '/items/search')  # get ?q=&min_price=&max_price=&sort=&limit=
+    api.add_resource(ImageFile, '/images/<path:image_path>')  # get
+
+    # admin routes
+    api.add_resource(RegisterItem, '/admin/item/register')  # post
+    api.add_resource(UpdateItem, '/admin/item/update/<int:item_id>')  # put
+    api.add_resource(DeleteItem, '/admin/item/delete/<int:item_id>')  # delete
+    api.add_resource(ItemImage, '/admin/item/image/<int:item_id>')  # post
+    api.add_resource(DeleteItemImage, '/admin/image/delete/<int:item_id>/<string:img_name>')  # delete
+    api.add_resource(UsersList, '/admin/users')  # get
+    api.add_resource(AddressList, '/admin/users/addresses')  # get
+    api.add_resource(ItemList, '/admin/items')  # get
+    api.add_resource(OrdersList, '/admin/orders')  # get
+    api.add_resource(UsersExport, '/admin/users/export')  # get (ndjson)
+    api.add_resource(AddressExport, '/admin/users/addresses/export')  # get (ndjson)
+    api.add_resource(OrdersExport, '/admin/orders/export')  # get (ndjson)
+    api.add_resource(OrderIsPacked, '/admin/order/packed/<int:order_id>')  # get
+    api.add_resource(OrderIsShipped, '/admin/order/shipped/<int:order_id>')  # get
+    api.add_resource(OrderIsDelivered, '/admin/order/delivered/<int:order_id>')  # get
+    api.add_resource(OrdersStatus, '/admin/orders/status')  # put (bulk packed/shipped/delivered)
+    api.add_resource(RevenueReport, '/admin/reports/revenue')  # get ?by=day|user|item&start=&end=
+    api.add_resource(SalesAnalytics, '/admin/analytics/sales')  # get ?start=&end=&refresh=1
+    api.add_resource(Dispatch, '/admin/dispatch')  # get (delivery batches for shipped orders)
+    api.add_resource(Metrics, '/metrics')  # get (prometheus text format)
+
+
+def create_app() -> Flask:
+    """Build and configure the application without touching the database."""
+    # no /static route: images are only served by ImageFile, which checks image_store
+    app = Flask(__name__, static_folder=None)
+    app.request_class = UploadRequest
+    load_dotenv('.env', verbose=True)
+    app.config.from_object("default_config")
+    app.config.from_envvar("APPLICATION_SETTINGS")
+    db.init_app(app)
+    ma.init_app(app)
+    migrate.init_app(app, db)
+    jwt.init_app(app)
+    register_routes(Api(app))
+    configure_uploads(app, IMAGE_SET)
+    image_store.load(app.config['UPLOADED_IMAGES_DEST'], app.config['IMAGE_RESCAN_SECONDS'])
+    init_metrics(app)
+    init_replica_routing(app)
+    init_unit_of_work(app)
+    app.register_error_handler(ValidationError, handle_validation)
+    app.cli.add_command(compact_blocklist)
+    return app
+
+
+def warm_up(app: Flask) -> None:
+    """Do the one-off startup work before uWSGI forks its workers.
+
+    Creates missing tables (and copies a SQLite primary into a SQLite
+    replica), configures the mappers and builds the catalog index, so workers
+    inherit them instead of paying for them on their first request. Every
+    engine connects once, which initializes its dialect, and is then disposed
+    so no socket is shared across the fork. Finally the heap is frozen so the
+    garbage collector does not write to pages the workers share copy-on-write.
+    """
+    with app.app_context():
+        db.create_all()
+        sync_sqlite_replica()
+        configure_mappers()
+        catalog_index.build()
+        for engine in db.engines.values():
+            engine.connect().close()
+            engine.dispose()
+    gc.freeze()
+
+
+if __name__ == '__main__':
+    app = create_app()
+    warm_up(app)
+    app.run(port=5000)
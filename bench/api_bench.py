@@ -0,0 +1,177 @@
+"""Benchmark the API hot paths against a seeded local database.
+
+    python -m bench.api_bench --scale 100k --workers 4 --requests 500
+
+The app is driven through the Flask test client, one client per load
+generator process. BENCH_DATABASE_URL points the run at a local Postgres or
+MySQL instead of the default SQLite file. Every scenario prints one JSON
+object with throughput, p50/p99 latency, queries per request and peak RSS.
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+from time import perf_counter
+from typing import Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault('APPLICATION_SETTINGS', os.path.join(BENCH_DIR, 'bench_config.py'))
+
+from PIL import Image  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+from app import warm_up  # noqa: E402
+from bench.seed import ADMIN_COUNT, ITEM_COUNT, PASSWORD, SCALES, seed, user_email  # noqa: E402
+from db import db  # noqa: E402
+from run import app  # noqa: E402
+
+_query_count = 0
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_query(*_):
+    global _query_count
+    _query_count += 1
+
+
+def _login(client, user_id: int) -> Dict[str, str]:
+    response = client.post('/user/login', json={'email': user_email(user_id), 'password': PASSWORD})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+def _png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), (200, 120, 40)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def _scenario_login(client, ctx):
+    return client.post('/user/login', json={'email': user_email(ctx['user_id']), 'password': PASSWORD})
+
+
+def _scenario_place_order(client, ctx):
+    items = [ctx['rng'].randint(1, ITEM_COUNT) for _ in range(ctx['rng'].randint(1, 40))]
+    return client.post('/user/order', json={'items': items}, headers=ctx['user'])
+
+
+def _scenario_user_orders(client, ctx):
+    return client.get('/user/orders', headers=ctx['user'])
+
+
+def _scenario_orders_list(client, ctx):
+    after = ctx['rng'].randint(0, ctx['order_count'])
+    return client.get(f'/admin/orders?after={after}&limit=50', headers=ctx['admin'])
+
+
+def _scenario_item_list(client, ctx):
+    return client.get('/admin/items?limit=200', headers=ctx['admin'])
+
+
+def _scenario_avatar_upload(client, ctx):
+    data = {'image': (io.BytesIO(ctx['png']), 'avatar.png')}
+    return client.post('/user/avatar', data=data, headers=ctx['user'], content_type='multipart/form-data')
+
+
+SCENARIOS: Dict[str, Callable] = {
+    'login': _scenario_login,
+    'place_order': _scenario_place_order,
+    'user_orders': _scenario_user_orders,
+    'orders_list': _scenario_orders_list,
+    'item_list': _scenario_item_list,
+    'avatar_upload': _scenario_avatar_upload,
+}
+
+
+def _run_worker(args) -> Dict:
+    scenario, requests, worker_index, customer_count, order_count = args
+    with app.app_context():
+        # never share the parent's pooled connections across fork
+        db.engine.dispose()
+    client = app.test_client()
+    user_id = ADMIN_COUNT + 1 + worker_index % customer_count
+    ctx = {
+        'rng': random.Random(worker_index),
+        'user_id': user_id,
+        'order_count': order_count,
+        'user': _login(client, user_id),
+        'admin': _login(client, 1),
+        'png': _png_bytes(),
+    }
+    latencies, queries, errors = [], [], 0
+    for _ in range(requests):
+        before = _query_count
+        start = perf_counter()
+        response = SCENARIOS[scenario](client, ctx)
+        latencies.append(perf_counter() - start)
+        queries.append(_query_count - before)
+        if response.status_code >= 400:
+            errors += 1
+    return {
+        'latencies': latencies,
+        'queries': queries,
+        'errors': errors,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(fraction * (len(ordered) - 1))]
+
+
+def run_scenario(scenario: str, workers: int, requests: int, customer_count: int, order_count: int) -> Dict:
+    jobs = [(scenario, requests, i, customer_count, order_count) for i in range(workers)]
+    start = perf_counter()
+    with multiprocessing.get_context('fork').Pool(workers) as pool:
+        results = pool.map(_run_worker, jobs)
+    elapsed = perf_counter() - start
+    latencies = [latency for result in results for latency in result['latencies']]
+    queries = [count for result in results for count in result['queries']]
+    return {
+        'scenario': scenario,
+        'workers': workers,
+        'requests': len(latencies),
+        'errors': sum(result['errors'] for result in results),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(_percentile(latencies, 0.50) * 1000, 3),
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 3),
+        'queries_per_request': round(sum(queries) / len(queries), 2),
+        'peak_rss_kb': max(result['peak_rss_kb'] for result in results),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=SCALES, default='1k')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=200, help='requests per worker and scenario')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                        help='scenario to run, may be repeated (default: all)')
+    parser.add_argument('--reuse', action='store_true', help='skip seeding and reuse the existing database')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    order_count = SCALES[args.scale]
+    with app.app_context():
+        if args.reuse:
+            customer_count = max(100, order_count // 10) - ADMIN_COUNT
+        else:
+            customer_count = seed(order_count, random.Random(args.seed))
+    # same startup path as the uWSGI master before it forks its workers
+    warm_up(app)
+
+    for scenario in args.scenario or SCENARIOS:
+        result = run_scenario(scenario, args.workers, args.requests, customer_count, order_count)
+        result['scale'] = args.scale
+        json.dump(result, sys.stdout)
+        sys.stdout.write('\n')
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+import os
+import tempfile
+
+DEBUG = False
+
+SQLALCHEMY_DATABASE_URI = os.environ.get(
+    "BENCH_DATABASE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "ekmek_bench.db"))
+if SQLALCHEMY_DATABASE_URI.startswith("sqlite"):
+    # several load-generator processes write to the same file
+    SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"timeout": 30}}
+
+JWT_SECRET_KEY = "bench-jwt-secret"
+SECRET_KEY = "bench-app-secret"
+
+UPLOADED_IMAGES_DEST = os.path.join(tempfile.gettempdir(), "ekmek_bench_images")
@@ -0,0 +1,86 @@
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List
+
+from db import db
+from models.address_model import AddressModel
+from models.item_model import ItemModel
+from models.order_model import ItemInOrder, OrderModel
+from models.user_model import UserModel
+
+SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+PASSWORD = 'bench-password'
+ADMIN_COUNT = 3
+ITEM_COUNT = 200
+MAX_LINES_PER_ORDER = 6
+CHUNK_SIZE = 10_000
+
+
+def user_email(user_id: int) -> str:
+    return f"user{user_id}@bench.local"
+
+
+def _chunks(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert(model, rows: Iterable[Dict]) -> None:
+    for chunk in _chunks(rows, CHUNK_SIZE):
+        db.session.execute(model.__table__.insert(), chunk)
+    db.session.commit()
+
+
+def seed(order_count: int, rng: random.Random) -> int:
+    """Recreate the schema and fill it with `order_count` orders.
+
+    Rows are inserted in id order on fresh tables, so users, items and orders
+    get ids 1..n. Users 1..ADMIN_COUNT receive the admin claim. Returns the
+    number of customers seeded.
+    """
+    user_count = max(100, order_count // 10)
+    db.drop_all()
+    db.create_all()
+    _insert(UserModel, ({
+        'full_name': f"Bench User {i}",
+        'email': user_email(i),
+        'phone': '5550000000',
+        'password': PASSWORD,
+        'is_admin': i <= ADMIN_COUNT,
+    } for i in range(1, user_count + 1)))
+    _insert(AddressModel, ({
+        'state': 'State',
+        'city': 'City',
+        'street': f"Street {i}",
+        'address_detail': f"Door {i}",
+        'latitude': 41.0 + rng.uniform(-0.2, 0.2),
+        'longitude': 29.0 + rng.uniform(-0.2, 0.2),
+        'user_id': i,
+    } for i in range(1, user_count + 1)))
+    prices = {i: round(rng.uniform(1, 50), 2) for i in range(1, ITEM_COUNT + 1)}
+    _insert(ItemModel, ({
+        'name': f"item {i}",
+        'price': prices[i],
+        'desc': f"description of item {i}",
+    } for i in range(1, ITEM_COUNT + 1)))
+    start = datetime.now() - timedelta(minutes=order_count)
+    _insert(OrderModel, ({
+        'order_date': start + timedelta(minutes=i),
+        'user_id': rng.randint(ADMIN_COUNT + 1, user_count),
+    } for i in range(order_count)))
+    _insert(ItemInOrder, (
+        {'order_id': order_id, 'item_id': item_id, 'quantity': rng.randint(1, 4), 'unit_price': prices[item_id]}
+        for order_id in range(1, order_count + 1)
+        for item_id in rng.sample(range(1, ITEM_COUNT + 1), rng.randint(1, MAX_LINES_PER_ORDER))
+    ))
+    line_totals = db.session.query(db.func.sum(ItemInOrder.quantity * ItemInOrder.unit_price)) \
+        .filter(ItemInOrder.order_id == OrderModel.id).scalar_subquery()
+    OrderModel.query.update({OrderModel.total: line_totals}, synchronize_session=False)
+    db.session.commit()
+    return user_count - ADMIN_COUNT
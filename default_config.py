@@ -4,9 +4,66 @@ DEBUG = True
 
 SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")  # "sqlite:///data.db"
 
+# GET requests read from this replica when set, e.g. "sqlite:///replica.db"
+# (a SQLite replica is refreshed from a SQLite primary at startup); a user
+# that just wrote keeps reading the primary for REPLICA_STICKY_SECONDS
+REPLICA_DATABASE_URL = os.environ.get("REPLICA_DATABASE_URL")
+SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+REPLICA_STICKY_SECONDS = 10
+
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
 JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY")
 SECRET_KEY = os.environ.get("APP_SECRET_KEY")
 
-UPLOADED_IMAGES_DEST = os.path.join('static', 'images')
\ No newline at end of file
+UPLOADED_IMAGES_DEST = os.path.join('static', 'images')
+# largest request body; uploads stream to disk and are rejected once past it
+MAX_CONTENT_LENGTH = 10 * 1024 * 1024
+
+# seconds between incremental reloads of the in-process JTI blocklist
+BLOCKLIST_REFRESH_SECONDS = 5
+BLOCKLIST_REFRESH_OVERLAP = 100
+# logout JTIs are written in batches of up to N rows, at most this many ms late
+BLOCKLIST_FLUSH_SIZE = 100
+BLOCKLIST_FLUSH_MS = 20
+# pause before a failed batch is written again
+BLOCKLIST_RETRY_SECONDS = 1
+
+# keyset pagination for the admin list endpoints (?after=<id>&limit=N)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# rows per batch for the streaming NDJSON export endpoints
+EXPORT_BATCH_SIZE = 1000
+
+# per-worker cache of serialized catalog pages (ETag / If-None-Match)
+CATALOG_CACHE_SECONDS = 30
+CATALOG_CACHE_MAX_ENTRIES = 256
+
+# processes per worker rendering thumbnail/WebP variants of uploaded images
+IMAGE_VARIANT_WORKERS = 2
+# shortest interval between re-listings of an image folder after an index miss
+IMAGE_RESCAN_SECONDS = 5
+
+# image delivery: set USE_X_SENDFILE=1 behind uWSGI so it streams the file
+USE_X_SENDFILE = os.environ.get("USE_X_SENDFILE") == "1"
+IMAGE_CACHE_SECONDS = 365 * 24 * 60 * 60
+AVATAR_CACHE_SECONDS = 5 * 60
+
+# largest id list accepted by the bulk order status endpoint
+MAX_BULK_ORDER_IDS = 1000
+
+# sales analytics: order ids folded per chunk, time windows kept per worker
+ANALYTICS_CHUNK_SIZE = 20000
+ANALYTICS_MAX_WINDOWS = 16
+# order ids below the high-water mark re-read on every fold, for late commits
+ANALYTICS_ORDER_OVERLAP = 1000
+
+# seconds before the in-process catalog search index is rebuilt from the db
+CATALOG_INDEX_MAX_AGE = 300
+
+# delivery dispatch: batch radius, stops per batch and depot (defaults to the centroid)
+DISPATCH_RADIUS_KM = 2.0
+DISPATCH_BATCH_SIZE = 15
+DISPATCH_DEPOT_LAT = float(os.environ["DISPATCH_DEPOT_LAT"]) if os.environ.get("DISPATCH_DEPOT_LAT") else None
+DISPATCH_DEPOT_LNG = float(os.environ["DISPATCH_DEPOT_LNG"]) if os.environ.get("DISPATCH_DEPOT_LNG") else None
\ No newline at end of file
@@ -0,0 +1,60 @@
+import threading
+from datetime import datetime
+from time import monotonic
+from typing import Dict, Optional
+
+from flask import current_app
+
+from models.blocklist_model import BlockListModel
+
+
+class BlockListCache:
+    """Per-worker set of revoked JTIs kept in front of the block_list table.
+
+    Lookups are answered from memory. At most once every
+    BLOCKLIST_REFRESH_SECONDS the rows added since the last refresh are pulled
+    in, so logouts handled by other workers are enforced within that window.
+    Entries whose token has expired are dropped on refresh; JWT validation
+    rejects such tokens before the blocklist is consulted.
+    """
+
+    def __init__(self):
+        self._jtis: Dict[str, Optional[datetime]] = {}
+        self._last_id = 0
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, jti: str, expires_at: Optional[datetime] = None) -> None:
+        with self._lock:
+            self._jtis[jti] = expires_at
+
+    def contains(self, jti: str) -> bool:
+        self._refresh_if_stale()
+        return jti in self._jtis
+
+    def _is_stale(self) -> bool:
+        if self._refreshed_at is None:
+            return True
+        return monotonic() - self._refreshed_at >= current_app.config['BLOCKLIST_REFRESH_SECONDS']
+
+    def _refresh_if_stale(self) -> None:
+        if not self._is_stale():
+            return
+        with self._lock:
+            if not self._is_stale():
+                return
+            # re-read a few ids behind the high-water mark so rows committed
+            # out of id order by concurrent logouts are not skipped
+            since = max(0, self._last_id - current_app.config['BLOCKLIST_REFRESH_OVERLAP'])
+            for _id, jti, expires_at in BlockListModel.find_since(since):
+                self._jtis[jti] = expires_at
+                self._last_id = max(self._last_id, _id)
+            now = datetime.utcnow()
+            self._jtis = {
+                jti: expires_at for jti, expires_at in self._jtis.items()
+                if expires_at is None or expires_at > now
+            }
+            self._refreshed_at = monotonic()
+
+
+blocklist_cache = BlockListCache()
@@ -0,0 +1,98 @@
+import atexit
+import logging
+import queue
+import threading
+from datetime import datetime
+from time import monotonic, sleep
+from typing import List, Optional, Tuple
+
+from flask import Flask, current_app
+
+from db import db
+from models.blocklist_model import BlockListModel
+
+logger = logging.getLogger(__name__)
+
+
+class BlockListWriter:
+    """Per-worker write-behind queue for block_list inserts.
+
+    Queued JTIs are written by a background thread with one multi-row INSERT
+    as soon as BLOCKLIST_FLUSH_SIZE entries are waiting or BLOCKLIST_FLUSH_MS
+    have passed since the first one. Callers add the JTI to blocklist_cache
+    first, so this worker enforces the revocation before the row is written.
+    A batch that fails is retried every BLOCKLIST_RETRY_SECONDS until it is
+    written or its tokens have expired.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Tuple[str, datetime]]" = queue.Queue()
+        self._app: Optional[Flask] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # batch taken off the queue by the thread and not yet written
+        self._in_flight: List[Tuple[str, datetime]] = []
+
+    def enqueue(self, jti: str, expires_at: datetime) -> None:
+        self._ensure_started()
+        self._queue.put((jti, expires_at))
+
+    def flush(self) -> None:
+        """Write the thread's pending batch and everything still queued from the calling thread."""
+        batch = list(self._in_flight)
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write(batch)
+
+    def _ensure_started(self) -> None:
+        # started lazily so every uWSGI worker gets its own thread after fork
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._app = current_app._get_current_object()
+            self._thread = threading.Thread(target=self._run, name='blocklist-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            batch = self._in_flight
+            if not batch:
+                batch.append(self._queue.get())
+            flush_size = self._app.config['BLOCKLIST_FLUSH_SIZE']
+            deadline = monotonic() + self._app.config['BLOCKLIST_FLUSH_MS'] / 1000
+            while len(batch) < flush_size:
+                timeout = deadline - monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if self._write(batch):
+                self._in_flight = []
+            else:
+                # keep the batch for the next attempt, minus tokens that expired meanwhile
+                now = datetime.utcnow()
+                self._in_flight = [entry for entry in batch if entry[1] is None or entry[1] > now]
+                sleep(self._app.config['BLOCKLIST_RETRY_SECONDS'])
+
+    def _write(self, entries: List[Tuple[str, datetime]]) -> bool:
+        with self._app.app_context():
+            try:
+                BlockListModel.bulk_insert(entries)
+                db.session.commit()
+                return True
+            except Exception:
+                db.session.rollback()
+                logger.exception("failed to write %d blocklist entries", len(entries))
+                return False
+
+
+blocklist_writer = BlockListWriter()
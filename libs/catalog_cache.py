@@ -0,0 +1,45 @@
+import hashlib
+import json
+import threading
+from time import monotonic
+from typing import Callable, Dict, Hashable, Tuple
+
+from flask import current_app
+
+
+class CatalogCache:
+    """Per-worker cache of serialized catalog responses.
+
+    Entries carry the catalog version that save_item/delete_item bump, and
+    expire after CATALOG_CACHE_SECONDS so item writes handled by other workers
+    are picked up as well. The ETag is a hash of the body, so it is the same
+    in every worker for the same catalog state.
+    """
+
+    def __init__(self):
+        self._version = 0
+        self._entries: Dict[Hashable, Tuple[int, float, bytes, str]] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], dict]) -> Tuple[bytes, str]:
+        now = monotonic()
+        entry = self._entries.get(key)
+        if entry and entry[0] == self._version and now - entry[1] < current_app.config['CATALOG_CACHE_SECONDS']:
+            return entry[2], entry[3]
+        version = self._version
+        body = json.dumps(build()).encode()
+        etag = hashlib.sha1(body).hexdigest()
+        with self._lock:
+            if version == self._version:
+                if len(self._entries) >= current_app.config['CATALOG_CACHE_MAX_ENTRIES']:
+                    self._entries.clear()
+                self._entries[key] = (version, now, body, etag)
+        return body, etag
+
+
+catalog_cache = CatalogCache()
@@ -0,0 +1,132 @@
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from time import monotonic
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from flask import current_app
+
+from libs.image_store import image_store
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+NAME_WEIGHT = 2
+DESC_WEIGHT = 1
+SORTS = ('relevance', 'price', '-price', 'name')
+
+
+def tokenize(text: Optional[str]) -> Set[str]:
+    return set(TOKEN_RE.findall(text.lower())) if text else set()
+
+
+class IndexedItem(NamedTuple):
+    id: int
+    name: str
+    price: float
+    image: Optional[str]
+    desc: str
+
+
+class CatalogIndex:
+    """In-process inverted index over item names and descriptions.
+
+    Built from one query on first use and rebuilt after CATALOG_INDEX_MAX_AGE
+    seconds to pick up writes made in other workers; save_item/delete_item
+    update it incrementally once their transaction commits. Every query token
+    is matched as a prefix of the indexed tokens, and all of them must match.
+    """
+
+    def __init__(self):
+        self._items: Dict[int, IndexedItem] = {}
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._sorted_tokens: List[str] = []
+        self._tokens_dirty = False
+        self._built_at: Optional[float] = None
+        self._lock = threading.RLock()
+
+    def build(self) -> None:
+        from models.item_model import ItemModel
+
+        rows = ItemModel.query.with_entities(
+            ItemModel.id, ItemModel.name, ItemModel.price, ItemModel.image, ItemModel.desc
+        ).all()
+        with self._lock:
+            self._items = {}
+            self._postings = defaultdict(dict)
+            for row in rows:
+                self._add(IndexedItem(*row))
+            self._tokens_dirty = True
+            self._built_at = monotonic()
+
+    def upsert(self, item: IndexedItem) -> None:
+        with self._lock:
+            self._remove(item.id)
+            self._add(item)
+
+    def remove(self, item_id: int) -> None:
+        with self._lock:
+            self._remove(item_id)
+
+    def search(self, query: str, min_price: Optional[float] = None, max_price: Optional[float] = None,
+               sort: str = 'relevance', limit: int = 50) -> List[Dict]:
+        with self._lock:
+            if self._built_at is None or monotonic() - self._built_at > current_app.config['CATALOG_INDEX_MAX_AGE']:
+                self.build()
+            scores = self._score(tokenize(query))
+            if scores is None:
+                scores = dict.fromkeys(self._items, 0)
+            items = [
+                self._items[_id] for _id in scores
+                if (min_price is None or self._items[_id].price >= min_price)
+                and (max_price is None or self._items[_id].price <= max_price)
+            ]
+        if sort == 'price':
+            items.sort(key=lambda item: (item.price, item.id))
+        elif sort == '-price':
+            items.sort(key=lambda item: (-item.price, item.id))
+        elif sort == 'name':
+            items.sort(key=lambda item: (item.name.lower(), item.id))
+        else:
+            items.sort(key=lambda item: (-scores[item.id], item.id))
+        return [dict(item._asdict(), image_variants=image_store.rendered_variants(item.image)) for item in items[:limit]]
+
+    def _score(self, tokens: Set[str]) -> Optional[Dict[int, int]]:
+        if not tokens:
+            return None
+        if self._tokens_dirty:
+            self._sorted_tokens = sorted(token for token, posting in self._postings.items() if posting)
+            self._tokens_dirty = False
+        scores = None
+        for token in tokens:
+            matches: Dict[int, int] = {}
+            position = bisect_left(self._sorted_tokens, token)
+            while position < len(self._sorted_tokens) and self._sorted_tokens[position].startswith(token):
+                for _id, weight in self._postings[self._sorted_tokens[position]].items():
+                    matches[_id] = max(matches.get(_id, 0), weight)
+                position += 1
+            if scores is None:
+                scores = matches
+            else:
+                scores = {_id: score + matches[_id] for _id, score in scores.items() if _id in matches}
+            if not scores:
+                break
+        return scores
+
+    def _add(self, item: IndexedItem) -> None:
+        self._items[item.id] = item
+        weights = dict.fromkeys(tokenize(item.desc), DESC_WEIGHT)
+        weights.update(dict.fromkeys(tokenize(item.name), NAME_WEIGHT))
+        for token, weight in weights.items():
+            if token not in self._postings or not self._postings[token]:
+                self._tokens_dirty = True
+            self._postings[token][item.id] = weight
+
+    def _remove(self, item_id: int) -> None:
+        item = self._items.pop(item_id, None)
+        if item is None:
+            return
+        for token in tokenize(item.name) | tokenize(item.desc):
+            self._postings[token].pop(item_id, None)
+
+
+catalog_index = CatalogIndex()
@@ -0,0 +1,141 @@
+import threading
+from functools import wraps
+from time import time
+from typing import Callable, Dict, Optional
+
+from flask import Flask, Response, current_app, has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+try:
+    import uwsgi
+except ImportError:  # not running under uWSGI
+    uwsgi = None
+
+REPLICA_BIND = 'replica'
+# uWSGI cache (see uwsgi.ini) shared by the workers; a per-process dict otherwise
+STICKY_CACHE = 'read_primary'
+_MAX_LOCAL_ENTRIES = 10000
+
+
+class StickyReads:
+    """Identities whose reads stay on the primary until a point in time.
+
+    Marks are kept server side and keyed on the JWT identity, so API clients
+    that do not keep cookies still read their own writes.
+    """
+
+    def __init__(self):
+        self._until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, identity, seconds: int) -> None:
+        until = time() + seconds
+        if uwsgi is not None:
+            uwsgi.cache_update(str(identity), str(until).encode(), seconds, STICKY_CACHE)
+            return
+        with self._lock:
+            if len(self._until) >= _MAX_LOCAL_ENTRIES:
+                now = time()
+                self._until = {key: value for key, value in self._until.items() if value > now}
+            self._until[str(identity)] = until
+
+    def is_marked(self, identity) -> bool:
+        if uwsgi is not None:
+            value = uwsgi.cache_get(str(identity), STICKY_CACHE)
+            until = float(value) if value else 0.0
+        else:
+            until = self._until.get(str(identity), 0.0)
+        return until > time()
+
+
+sticky_reads = StickyReads()
+
+
+def _current_identity() -> Optional[object]:
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        # no token has been verified for this request (yet)
+        return None
+
+
+def _reads_from_replica(session: Session) -> bool:
+    if not has_request_context() or request.method not in ('GET', 'HEAD'):
+        return False
+    if session.info.get('read_primary'):
+        return False
+    identity = _current_identity()
+    return identity is None or not sticky_reads.is_marked(identity)
+
+
+def read_primary(view: Callable) -> Callable:
+    """Send every statement of `view` to the primary.
+
+    For GET endpoints that write: the rows they update must be read from the
+    primary, not from a replica that may not have them yet.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        current_app.extensions['sqlalchemy'].session.info['read_primary'] = True
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+class RoutingSession(Session):
+    """Session that sends the reads of GET requests to the replica bind.
+
+    Everything else goes to the primary: non-GET requests, views marked with
+    read_primary, flushes, bulk INSERT/UPDATE/DELETE statements, any read made
+    after the session has written and the reads of an identity that wrote
+    within the last REPLICA_STICKY_SECONDS, so clients see their own changes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase):
+                self.info['wrote'] = True
+            elif not self.info.get('wrote') and _reads_from_replica(self):
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def init_replica_routing(app: Flask) -> None:
+    """Pin an identity's reads to the primary for a while after it writes.
+
+    Must be registered before init_unit_of_work: after_request hooks run in
+    reverse order, so this one sees the response after the commit.
+    """
+
+    @app.after_request
+    def stick_to_primary(response: Response) -> Response:
+        session = current_app.extensions['sqlalchemy'].session
+        if session.info.pop('wrote', False) and response.status_code < 400:
+            identity = _current_identity()
+            if identity is not None:
+                sticky_reads.mark(identity, current_app.config['REPLICA_STICKY_SECONDS'])
+        return response
+
+
+def sync_sqlite_replica() -> None:
+    """Copy a local SQLite primary into a SQLite replica file.
+
+    Lets two SQLite files stand in for primary and replica during
+    development: the replica gets the schema and a snapshot of the data,
+    which then lags behind the primary like a real one.
+    """
+    db = current_app.extensions['sqlalchemy']
+    replica = db.engines.get(REPLICA_BIND)
+    if replica is None or replica.dialect.name != 'sqlite' or db.engine.dialect.name != 'sqlite':
+        return
+    source, target = db.engine.raw_connection(), replica.raw_connection()
+    try:
+        source.driver_connection.backup(target.driver_connection)
+    finally:
+        target.close()
+        source.close()
@@ -0,0 +1,180 @@
+import heapq
+import math
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from flask import current_app
+
+from db import db
+from models.address_model import AddressModel
+from models.order_model import OrderModel
+from models.user_model import UserModel
+
+KM_PER_DEGREE_LAT = 110.57
+KM_PER_DEGREE_LNG_AT_EQUATOR = 111.32
+# smaller cells let nearest() stop after the first rings in dense areas
+GRID_CELLS_PER_RADIUS = 4
+
+
+class Stop(NamedTuple):
+    order_id: int
+    latitude: float
+    longitude: float
+    x: float
+    y: float
+
+
+def _distance(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+class GridIndex:
+    """Uniform grid over projected (km) coordinates for nearest-stop queries.
+
+    Stops are removed once they are assigned, so later queries only visit the
+    stops that are still unassigned.
+    """
+
+    def __init__(self, stops: List[Stop], cell_km: float):
+        self.cell_km = cell_km
+        self.cells: Dict[Tuple[int, int], Dict[int, Stop]] = defaultdict(dict)
+        for stop in stops:
+            self.cells[self._cell(stop.x, stop.y)][stop.order_id] = stop
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(math.floor(x / self.cell_km)), int(math.floor(y / self.cell_km))
+
+    def remove(self, stop: Stop) -> None:
+        key = self._cell(stop.x, stop.y)
+        cell = self.cells[key]
+        del cell[stop.order_id]
+        if not cell:
+            del self.cells[key]
+
+    def _ring(self, cx: int, cy: int, ring: int) -> List[Tuple[int, int]]:
+        if ring == 0:
+            return [(cx, cy)]
+        cells = [(cx + dx, cy + dy) for dx in range(-ring, ring + 1) for dy in (-ring, ring)]
+        cells += [(cx + dx, cy + dy) for dx in (-ring, ring) for dy in range(1 - ring, ring)]
+        return cells
+
+    def nearest(self, stop: Stop, radius_km: float, count: int) -> List[Stop]:
+        """Up to `count` stops within `radius_km` of `stop`, nearest first.
+
+        Rings of cells are searched outwards and the search stops as soon as
+        no unvisited cell can hold a closer stop than the `count` found so far.
+        """
+        cx, cy = self._cell(stop.x, stop.y)
+        found = []
+        for ring in range(int(math.ceil(radius_km / self.cell_km)) + 1):
+            for key in self._ring(cx, cy, ring):
+                for other in self.cells.get(key, {}).values():
+                    distance = _distance((stop.x, stop.y), (other.x, other.y))
+                    if distance <= radius_km:
+                        found.append((distance, other.order_id, other))
+            # every stop in the cells beyond this ring is at least this far away
+            covered = ring * self.cell_km
+            if sum(1 for distance, _, _ in found if distance <= covered) >= count:
+                break
+        return [other for _, _, other in heapq.nsmallest(count, found)]
+
+
+def _pending_stops() -> Tuple[List[Tuple[int, Optional[float], Optional[float]]], List[int]]:
+    rows = db.session.query(OrderModel.id, AddressModel.latitude, AddressModel.longitude) \
+        .outerjoin(AddressModel, AddressModel.user_id == OrderModel.user_id) \
+        .filter(OrderModel.is_shipped.is_(True), OrderModel.is_delivered.is_(False)) \
+        .order_by(OrderModel.id, AddressModel.id)
+    located, unroutable, seen = [], [], set()
+    for order_id, latitude, longitude in rows:
+        if order_id in seen:
+            continue
+        seen.add(order_id)
+        if latitude is None or longitude is None:
+            unroutable.append(order_id)
+        else:
+            located.append((order_id, latitude, longitude))
+    return located, unroutable
+
+
+def _cluster(stops: List[Stop], radius_km: float, batch_size: int) -> List[List[Stop]]:
+    """Greedy clustering: grow each batch from a seed with its nearest unassigned neighbours."""
+    grid = GridIndex(stops, radius_km / GRID_CELLS_PER_RADIUS)
+    assigned = set()
+    batches = []
+    for seed in sorted(stops, key=lambda stop: (stop.x, stop.y)):
+        if seed.order_id in assigned:
+            continue
+        batch = grid.nearest(seed, radius_km, batch_size)
+        for stop in batch:
+            grid.remove(stop)
+        assigned.update(stop.order_id for stop in batch)
+        batches.append(batch)
+    return batches
+
+
+def _route(batch: List[Stop], depot: Tuple[float, float]) -> Tuple[List[Stop], float]:
+    """Order a batch by repeatedly visiting the nearest remaining stop."""
+    remaining = list(batch)
+    position, route, distance = depot, [], 0.0
+    while remaining:
+        nearest = min(remaining, key=lambda stop: _distance(position, (stop.x, stop.y)))
+        remaining.remove(nearest)
+        distance += _distance(position, (nearest.x, nearest.y))
+        position = (nearest.x, nearest.y)
+        route.append(nearest)
+    return route, distance
+
+
+def plan_dispatch() -> Dict:
+    """Batch the shipped but undelivered orders and assign them to delivery users.
+
+    Orders are clustered on their delivery address within DISPATCH_RADIUS_KM
+    (at most DISPATCH_BATCH_SIZE per batch), each batch is ordered by a
+    nearest-neighbour route from the depot and batches are handed to the
+    delivery user with the fewest stops so far. The response always has the
+    same keys; depot is None when it is not configured and there is nothing
+    to route.
+    """
+    config = current_app.config
+    located, unroutable = _pending_stops()
+    depot_lat = config['DISPATCH_DEPOT_LAT']
+    depot_lng = config['DISPATCH_DEPOT_LNG']
+    if not located:
+        depot = None if depot_lat is None or depot_lng is None else {'latitude': depot_lat, 'longitude': depot_lng}
+        return {'depot': depot, 'couriers': [], 'unassigned': [], 'unroutable': unroutable}
+
+    if depot_lat is None or depot_lng is None:
+        depot_lat = sum(row[1] for row in located) / len(located)
+        depot_lng = sum(row[2] for row in located) / len(located)
+    # equirectangular projection around the depot; accurate at city scale
+    km_per_degree_lng = KM_PER_DEGREE_LNG_AT_EQUATOR * math.cos(math.radians(depot_lat))
+    stops = [
+        Stop(order_id, lat, lng, (lng - depot_lng) * km_per_degree_lng, (lat - depot_lat) * KM_PER_DEGREE_LAT)
+        for order_id, lat, lng in located
+    ]
+    batches = _cluster(stops, config['DISPATCH_RADIUS_KM'], config['DISPATCH_BATCH_SIZE'])
+
+    routes = []
+    for batch in batches:
+        route, distance = _route(batch, (0.0, 0.0))
+        routes.append({'orders': [stop.order_id for stop in route], 'distance_km': round(distance, 2)})
+    routes.sort(key=lambda route: len(route['orders']), reverse=True)
+
+    depot = {'latitude': depot_lat, 'longitude': depot_lng}
+    couriers = UserModel.query.with_entities(UserModel.id).filter(UserModel.is_delivery.is_(True)) \
+        .order_by(UserModel.id).all()
+    if not couriers:
+        return {'depot': depot, 'couriers': [], 'unassigned': routes, 'unroutable': unroutable}
+    plan = {courier_id: [] for courier_id, in couriers}
+    load = [(0, courier_id) for courier_id in plan]
+    heapq.heapify(load)
+    for route in routes:
+        stops_so_far, courier_id = heapq.heappop(load)
+        plan[courier_id].append(route)
+        heapq.heappush(load, (stops_so_far + len(route['orders']), courier_id))
+    return {
+        'depot': depot,
+        'couriers': [{'courier_id': courier_id, 'batches': batches} for courier_id, batches in plan.items()],
+        'unassigned': [],
+        'unroutable': unroutable,
+    }
@@ -0,0 +1,27 @@
+import json
+from typing import Iterator, Union
+
+from flask import Response, current_app, stream_with_context
+from marshmallow import Schema
+
+from libs.fast_dump import FastDumper
+
+
+def _iter_ndjson(model, schema: Union[Schema, FastDumper], batch_size: int) -> Iterator[str]:
+    after = 0
+    while True:
+        rows = model.find_page(after, batch_size)
+        if not rows:
+            return
+        yield ''.join(json.dumps(schema.dump(row)) + '\n' for row in rows)
+        after = rows[-1].id
+
+
+def ndjson_response(model, schema: Union[Schema, FastDumper]) -> Response:
+    """Stream every row of `model` as newline-delimited JSON.
+
+    Rows are read in keyset batches of EXPORT_BATCH_SIZE, so memory stays flat
+    regardless of table size and the first batch is sent as soon as it is read.
+    """
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    return Response(stream_with_context(_iter_ndjson(model, schema, batch_size)), mimetype='application/x-ndjson')
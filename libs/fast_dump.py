@@ -0,0 +1,88 @@
+import keyword
+from typing import Any, Callable, Dict
+
+from marshmallow import Schema, fields
+
+from libs.metrics import serialization_timer
+
+# field types whose serialization is a plain conversion of a non-None value
+_CONVERTERS = {
+    fields.Integer: int,
+    fields.Float: float,
+    fields.String: str,
+    fields.Boolean: bool,
+}
+
+
+def _converter(field: fields.Field) -> Callable[[Any], Any]:
+    if getattr(field, 'as_string', False):
+        return None
+    if type(field) is fields.DateTime and field.format in (None, 'iso'):
+        return lambda value: value.isoformat()
+    return _CONVERTERS.get(type(field))
+
+
+def _is_plain_attribute(attribute: str) -> bool:
+    # only names that can be compiled as obj.<attribute>
+    return attribute.isidentifier() and not keyword.iskeyword(attribute)
+
+
+def _has_dump_hooks(schema: Schema) -> bool:
+    # Schema._hooks is private and there is no public way to list hooks.
+    # Checked against marshmallow 3.x, where keys are ('post_dump', many)
+    # tuples, and 4.x (4.3.1), where they are plain 'post_dump' strings;
+    # test_fast_dump fails if a later release changes this.
+    return any(
+        hooks for key, hooks in schema._hooks.items()
+        if (key if isinstance(key, str) else key[0]) in ('pre_dump', 'post_dump')
+    )
+
+
+def compile_dumper(schema: Schema) -> Callable[[Any], Dict]:
+    """Compile `schema` into a function that dumps one object like schema.dump().
+
+    Plain columns become a direct attribute read plus conversion, Nested
+    fields call their own compiled dumper, and any other field falls back to
+    its marshmallow serialize(). Schemas with dump hooks are not compiled.
+    """
+    if _has_dump_hooks(schema):
+        return schema.dump
+    namespace = {}
+    entries = []
+    for i, (name, field) in enumerate(schema.dump_fields.items()):
+        key = field.data_key if field.data_key is not None else name
+        attribute = field.attribute or name
+        convert = _converter(field)
+        if type(field) is fields.Nested and _is_plain_attribute(attribute):
+            namespace[f'_n{i}'] = compile_dumper(field.schema)
+            if field.many:
+                value = f"[_n{i}(item) for item in v{i}]"
+            else:
+                value = f"_n{i}(v{i})"
+            expression = f"None if (v{i} := obj.{attribute}) is None else {value}"
+        elif convert is not None and _is_plain_attribute(attribute):
+            namespace[f'_c{i}'] = convert
+            expression = f"None if (v{i} := obj.{attribute}) is None else _c{i}(v{i})"
+        else:
+            namespace[f'_f{i}'] = field.serialize
+            namespace[f'_a{i}'] = name
+            expression = f"_f{i}(_a{i}, obj, accessor=_get_attribute)"
+        entries.append(f"{key!r}: {expression}")
+    namespace['_get_attribute'] = schema.get_attribute
+    source = "def dump(obj):\n    return {%s}\n" % ", ".join(entries)
+    exec(compile(source, f"<fast_dump {type(schema).__name__}>", 'exec'), namespace)
+    return namespace['dump']
+
+
+class FastDumper:
+    """Drop-in for schema.dump() on hot read paths, compiled once per schema."""
+
+    def __init__(self, schema: Schema):
+        self.schema = schema
+        self._dump = compile_dumper(schema)
+
+    def dump(self, obj, many: bool = False):
+        with serialization_timer():
+            if many:
+                return [self._dump(item) for item in obj]
+            return self._dump(obj)
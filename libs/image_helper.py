@@ -1,15 +1,46 @@
 import os
+import posixpath
 import re
-from typing import Union
+from typing import Dict, Union
 
-from flask_uploads import UploadSet, IMAGES
+from flask_uploads import UploadNotAllowed, UploadSet, IMAGES, extension
 from werkzeug.datastructures import FileStorage
 
-IMAGE_SET = UploadSet('images', IMAGES)
+from libs.image_upload import IMAGE_TYPES, ImageSpool
+
+# SVG is scriptable markup that would be served from the API origin, and Pillow
+# cannot render variants of it, so only raster formats are accepted
+IMAGE_EXTENSIONS = tuple(_format for _format in IMAGES if _format != 'svg')
+IMAGE_SET = UploadSet('images', IMAGE_EXTENSIONS)
+
+# resized copies rendered off the request path: variant name -> longest edge in px
+IMAGE_VARIANTS = {
+    'thumb': 150,
+    'medium': 600,
+    'large': 1200,
+}
+VARIANT_FORMAT = 'webp'
 
 
 def save_image(image: FileStorage, folder: str, name: str= None) -> str:
-    return IMAGE_SET.save(image, folder, name)
+    """IMAGE_SET.save() that renames a spooled upload into place instead of copying it.
+
+    The sniffed type must match the extension the image is saved under.
+    """
+    spool = image.stream
+    if not isinstance(spool, ImageSpool):
+        return IMAGE_SET.save(image, folder, name)
+    basename = IMAGE_SET.get_basename(image.filename)
+    if name:
+        basename = name + extension(basename) if name.endswith('.') else name
+    if not IMAGE_SET.file_allowed(image, basename) or extension(basename) not in IMAGE_TYPES[spool.kind]:
+        raise UploadNotAllowed()
+    target_folder = IMAGE_SET.path('', folder)
+    os.makedirs(target_folder, exist_ok=True)
+    if os.path.exists(os.path.join(target_folder, basename)):
+        basename = IMAGE_SET.resolve_conflict(target_folder, basename)
+    spool.move_to(os.path.join(target_folder, basename))
+    return posixpath.join(folder, basename)
 
 
 def get_path(filename: str, folder: str) -> str:
@@ -22,19 +53,9 @@ def _retrieve_filename(file: Union[str, FileStorage], folder: str) -> str:
     return file
 
 
-def image_any_format(file: Union[str, FileStorage], folder: str) -> Union[None, str]:
-    filename = _retrieve_filename(file)
-    for _format in IMAGES:
-        image = f"{filename}.{_format}"
-        image_path = get_path(image, folder)
-        if os.path.isfile(image_path):
-            return image_path
-    return None
-
-
 def is_filename_safe(file: Union[str, FileStorage], folder: str) -> bool:
     filename = _retrieve_filename(file)
-    allowed_format = '|'.join(IMAGES)
+    allowed_format = '|'.join(IMAGE_EXTENSIONS)
     regex = f"^[a-zA-Z0-9][a-zA-Z0-9_()-\.]*\.({allowed_format})$"
     return re.match(regex, filename) is not None
 
@@ -47,3 +68,22 @@ def get_basename(file: Union[str, FileStorage]) -> str:
 def get_extension(file: Union[str, FileStorage]) -> str:
     filename = _retrieve_filename(file)
     return os.path.splitext(filename)[1]
+
+
+def variant_name(image_path: str, variant: str) -> str:
+    # keep the original's extension so avatar.png and avatar.jpg never share variants
+    return f"{image_path}.{variant}.{VARIANT_FORMAT}"
+
+
+def variant_paths(image_path: Union[None, str]) -> Dict[str, str]:
+    if not image_path:
+        return {}
+    return {variant: variant_name(image_path, variant) for variant in IMAGE_VARIANTS}
+
+
+def remove_variants(image_path: str) -> None:
+    for path in variant_paths(image_path).values():
+        try:
+            os.unlink(IMAGE_SET.path(path))
+        except FileNotFoundError:
+            pass
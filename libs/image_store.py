@@ -0,0 +1,130 @@
+import os
+import re
+import threading
+from collections import defaultdict
+from time import monotonic
+from typing import Dict, List, Optional, Set
+
+from werkzeug.datastructures import FileStorage
+
+from libs.image_helper import (IMAGE_EXTENSIONS, IMAGE_SET, IMAGE_VARIANTS, VARIANT_FORMAT, remove_variants, save_image,
+                               variant_paths)
+
+# the only folders images are stored in; anything else is never listed
+OWNER_FOLDER_RE = re.compile(r"^(user_\d+|items/item_\d+)$")
+# folders whose last rescan time is remembered before stale entries are pruned
+_MAX_SCANNED_FOLDERS = 4096
+_VARIANT_SUFFIXES = tuple(f".{variant}.{VARIANT_FORMAT}" for variant in IMAGE_VARIANTS)
+
+
+def user_folder(user_id: int) -> str:
+    return f"user_{user_id}"
+
+
+def item_folder(item_id: int) -> str:
+    return f"items/item_{item_id}"
+
+
+class ImageStore:
+    """In-memory index of the uploaded images and their variants, keyed by folder.
+
+    The index is built by a single scan of UPLOADED_IMAGES_DEST at startup and
+    kept current by save/delete and by the variant renderer, so lookups do
+    not touch the filesystem. An owner folder (user_<id>, items/item_<id>) is
+    re-listed when a lookup misses, at most once every `rescan_seconds`, which
+    picks up files written by other workers. Lookups outside owner folders
+    only consult the index.
+    """
+
+    def __init__(self):
+        self._root: Optional[str] = None
+        self._rescan_seconds = 0.0
+        self._files: Dict[str, Set[str]] = defaultdict(set)
+        self._scanned_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def load(self, root: str, rescan_seconds: float = 0.0) -> None:
+        files = defaultdict(set)
+        for dirpath, _, filenames in os.walk(root):
+            folder = os.path.relpath(dirpath, root).replace(os.sep, '/')
+            files[folder] = {name for name in filenames if self._is_image(name)}
+        with self._lock:
+            self._root = root
+            self._rescan_seconds = rescan_seconds
+            self._files = files
+            self._scanned_at = {}
+
+    def save(self, image: FileStorage, folder: str, name: str = None) -> str:
+        image_path = save_image(image, folder, name)
+        self.add(image_path)
+        return image_path
+
+    def delete(self, image_path: str) -> None:
+        self._discard(image_path)
+        for path in variant_paths(image_path).values():
+            self._discard(path)
+        remove_variants(image_path)
+        try:
+            os.unlink(IMAGE_SET.path(image_path))
+        except FileNotFoundError:
+            pass
+
+    def contains(self, image_path: str) -> bool:
+        folder, name = os.path.split(image_path)
+        if name in self._files.get(folder, ()):
+            return True
+        return self._rescan(folder) and name in self._files.get(folder, ())
+
+    def images_for(self, folder: str) -> List[str]:
+        """Stored originals (not variants) of one owner, e.g. images_for(item_folder(item_id))."""
+        if folder not in self._files:
+            self._rescan(folder)
+        names = sorted(self._files.get(folder, ()))
+        return [f"{folder}/{name}" for name in names if not name.endswith(_VARIANT_SUFFIXES)]
+
+    def rendered_variants(self, image_path: Optional[str]) -> Dict[str, str]:
+        """The variants of `image_path` that have been rendered, by variant name."""
+        if not image_path:
+            return {}
+        return {variant: path for variant, path in variant_paths(image_path).items() if self.contains(path)}
+
+    def _rescan(self, folder: str) -> bool:
+        if self._root is None or not OWNER_FOLDER_RE.match(folder):
+            return False
+        now = monotonic()
+        if now - self._scanned_at.get(folder, float('-inf')) < self._rescan_seconds:
+            return False
+        if len(self._scanned_at) >= _MAX_SCANNED_FOLDERS:
+            # entries older than rescan_seconds no longer throttle anything
+            self._scanned_at = {
+                key: scanned for key, scanned in self._scanned_at.items() if now - scanned < self._rescan_seconds
+            }
+            if len(self._scanned_at) >= _MAX_SCANNED_FOLDERS:
+                self._scanned_at.clear()
+        self._scanned_at[folder] = now
+        try:
+            names = os.listdir(os.path.join(self._root, folder))
+        except FileNotFoundError:
+            return False
+        with self._lock:
+            self._files[folder] = {name for name in names if self._is_image(name)}
+        return True
+
+    def add(self, image_path: str) -> None:
+        folder, name = os.path.split(image_path)
+        with self._lock:
+            self._files[folder].add(name)
+
+    def _discard(self, image_path: str) -> None:
+        folder, name = os.path.split(image_path)
+        with self._lock:
+            self._files[folder].discard(name)
+
+    @staticmethod
+    def _is_image(name: str) -> bool:
+        # skips the .part/.tmp files of uploads and renders still in progress
+        extension = os.path.splitext(name)[1][1:].lower()
+        return extension in IMAGE_EXTENSIONS or extension == VARIANT_FORMAT
+
+
+image_store = ImageStore()
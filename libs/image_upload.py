@@ -0,0 +1,114 @@
+import os
+import tempfile
+from typing import Optional
+
+from flask import Request, current_app
+from werkzeug.exceptions import LengthRequired, RequestEntityTooLarge, UnsupportedMediaType
+
+# uploads are spooled here, inside UPLOADED_IMAGES_DEST so the final move is a rename
+INCOMING_FOLDER = '.incoming'
+
+# sniffed image type -> file extensions it may be saved under
+IMAGE_TYPES = {
+    'jpeg': ('jpg', 'jpe', 'jpeg'),
+    'png': ('png',),
+    'gif': ('gif',),
+    'bmp': ('bmp',),
+    'webp': ('webp',),
+}
+_HEAD_SIZE = 16
+
+
+def sniff_image(head: bytes) -> Optional[str]:
+    """Image type of a file from its first bytes, or None if it is not an image."""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if head.startswith(b'BM'):
+        return 'bmp'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class ImageSpool:
+    """Temp file a multipart upload is written into as it is received.
+
+    The type is sniffed from the first bytes and the size is counted on every
+    chunk, so a non-image (SVG included) or oversized body is rejected while it is still
+    being read. move_to() renames the file into place; otherwise it is removed
+    when the request is closed.
+    """
+
+    def __init__(self, directory: str, limit: int):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.name = tempfile.mkstemp(suffix='.part', dir=directory)
+        self._file = os.fdopen(fd, 'w+b')
+        self._limit = limit
+        self._size = 0
+        self._head = b''
+        self.kind: Optional[str] = None
+
+    def write(self, data: bytes) -> int:
+        self._size += len(data)
+        if self._size > self._limit:
+            raise RequestEntityTooLarge()
+        if self.kind is None and len(self._head) < _HEAD_SIZE:
+            self._head += data[:_HEAD_SIZE - len(self._head)]
+            if len(self._head) == _HEAD_SIZE:
+                self._sniff()
+        return self._file.write(data)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        # the parser rewinds the file once the part is complete
+        if self.kind is None:
+            self._sniff()
+        return self._file.seek(offset, whence)
+
+    def move_to(self, target: str) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        os.replace(self.name, target)
+        self.name = None
+
+    def close(self) -> None:
+        self._file.close()
+        if self.name is not None:
+            try:
+                os.unlink(self.name)
+            except FileNotFoundError:
+                pass
+            self.name = None
+
+    def __getattr__(self, attr):
+        return getattr(self._file, attr)
+
+    def _sniff(self) -> None:
+        self.kind = sniff_image(self._head)
+        if self.kind is None:
+            raise UnsupportedMediaType('fail: uploaded file is not an image')
+
+
+class UploadRequest(Request):
+    """Request whose multipart files are streamed straight to an ImageSpool.
+
+    Werkzeug rejects a Content-Length above MAX_CONTENT_LENGTH before reading
+    the body; bodies without a length are refused here. Spools are tracked on
+    the request so one abandoned by a rejected parse is still removed.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is None:
+            raise LengthRequired()
+        directory = os.path.join(current_app.config['UPLOADED_IMAGES_DEST'], INCOMING_FOLDER)
+        spool = ImageSpool(directory, current_app.config['MAX_CONTENT_LENGTH'])
+        self.__dict__.setdefault('_spools', []).append(spool)
+        return spool
+
+    def close(self) -> None:
+        super().close()
+        for spool in self.__dict__.pop('_spools', ()):
+            spool.close()
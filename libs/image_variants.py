@@ -0,0 +1,57 @@
+import logging
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from typing import Optional
+
+from flask import current_app
+from PIL import Image
+
+from libs.catalog_cache import catalog_cache
+from libs.image_helper import IMAGE_SET, IMAGE_VARIANTS, VARIANT_FORMAT, variant_name, variant_paths
+from libs.image_store import image_store
+
+logger = logging.getLogger(__name__)
+
+# created on first use so each uWSGI worker gets its own pool after fork
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _render_variants(source: str) -> None:
+    with Image.open(source) as image:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        for variant, size in IMAGE_VARIANTS.items():
+            resized = image.copy()
+            resized.thumbnail((size, size))
+            target = variant_name(source, variant)
+            resized.save(f"{target}.tmp", VARIANT_FORMAT, quality=80)
+            os.replace(f"{target}.tmp", target)
+
+
+def _finish(image_path: str, future: Future) -> None:
+    error = future.exception()
+    if error is not None:
+        logger.error("image variant rendering failed: %s", error)
+        return
+    for path in variant_paths(image_path).values():
+        image_store.add(path)
+    if image_path.startswith('items/'):
+        # cached catalog pages list the item's image_variants
+        catalog_cache.invalidate()
+
+
+def schedule_variants(image_path: str) -> Future:
+    """Render the IMAGE_VARIANTS of an uploaded image in the worker pool.
+
+    `image_path` is the path returned by save_image. The variants land next
+    to the original as <name>.<ext>.<variant>.webp, see variant_paths, and
+    are added to image_store once all of them are written, and item images
+    invalidate the catalog cache.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=current_app.config['IMAGE_VARIANT_WORKERS'])
+    future = _executor.submit(_render_variants, IMAGE_SET.path(image_path))
+    future.add_done_callback(partial(_finish, image_path))
+    return future
@@ -0,0 +1,89 @@
+import os
+from contextlib import contextmanager
+from time import perf_counter
+
+from flask import Flask, Response, g, has_request_context, request
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Histogram, generate_latest
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Total request latency', ['endpoint', 'method'])
+DB_QUERIES = Histogram(
+    'db_queries_per_request', 'SQL statements executed per request', ['endpoint'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89))
+DB_TIME = Histogram(
+    'db_time_seconds', 'Time spent executing SQL per request', ['endpoint'])
+SERIALIZATION_TIME = Histogram(
+    'serialization_seconds', 'Time spent dumping schemas per request', ['endpoint'])
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _end_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - conn.info['query_start'].pop()
+    if has_request_context() and 'request_start' in g:
+        g.db_queries += 1
+        g.db_time += elapsed
+
+
+@contextmanager
+def serialization_timer():
+    """Add the time spent in the block to the request's serialization time.
+
+    Nested uses (a schema dumping its nested schemas) are only counted once.
+    """
+    if not has_request_context() or g.get('dumping'):
+        yield
+        return
+    g.dumping = True
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        g.dumping = False
+        g.serialization_time = g.get('serialization_time', 0.0) + perf_counter() - start
+
+
+class TimedSchemaMixin:
+    """Adds the time spent in top-level dump() calls to the request metrics."""
+
+    def dump(self, obj, *, many=None):
+        with serialization_timer():
+            return super().dump(obj, many=many)
+
+
+def init_metrics(app: Flask) -> None:
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = perf_counter()
+        g.db_queries = 0
+        g.db_time = 0.0
+        g.serialization_time = 0.0
+
+    @app.teardown_request
+    def record_request_metrics(_):
+        if 'request_start' not in g:
+            return
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.labels(endpoint, request.method).observe(perf_counter() - g.request_start)
+        DB_QUERIES.labels(endpoint).observe(g.db_queries)
+        DB_TIME.labels(endpoint).observe(g.db_time)
+        SERIALIZATION_TIME.labels(endpoint).observe(g.serialization_time)
+
+
+def metrics_response() -> Response:
+    # under uWSGI every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+    # and the scrape merges them
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,15 @@
+from typing import List, Optional, Tuple
+
+from flask import current_app, request
+
+
+def get_page_args() -> Tuple[int, int]:
+    after = request.args.get('after', 0, type=int)
+    limit = request.args.get('limit', current_app.config['DEFAULT_PAGE_SIZE'], type=int)
+    return max(after, 0), min(max(limit, 1), current_app.config['MAX_PAGE_SIZE'])
+
+
+def next_cursor(rows: List, limit: int) -> Optional[int]:
+    if len(rows) < limit:
+        return None
+    return rows[-1].id
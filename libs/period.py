@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Optional, Tuple
+
+from flask import request
+
+
+def _parse_datetime(name: str) -> Optional[datetime]:
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"fail: {name} must be an ISO 8601 date or datetime, got {value!r}")
+
+
+def get_period_args() -> Tuple[Optional[datetime], Optional[datetime]]:
+    """The optional ?start=&end= range of a report; raises ValueError on malformed dates."""
+    start, end = _parse_datetime('start'), _parse_datetime('end')
+    if start and end and start > end:
+        raise ValueError("fail: start must not be after end")
+    return start, end
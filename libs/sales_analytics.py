@@ -0,0 +1,142 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
+from flask import current_app
+
+from db import db
+from models.order_model import ItemInOrder, OrderModel
+
+Window = Tuple[Optional[datetime], Optional[datetime]]
+
+
+def _merge_counts(keys: np.ndarray, counts: np.ndarray, new_keys: np.ndarray, new_counts: np.ndarray):
+    merged_keys, inverse = np.unique(np.concatenate([keys, new_keys]), return_inverse=True)
+    merged_counts = np.bincount(inverse, weights=np.concatenate([counts, new_counts]), minlength=len(merged_keys))
+    return merged_keys, merged_counts.astype(np.int64)
+
+
+class SalesWindow:
+    """Running sales aggregates for the orders placed in one time window."""
+
+    def __init__(self, start: Optional[datetime], end: Optional[datetime]):
+        self.start = start
+        self.end = end
+        self.last_order_id = 0
+        # folded ids within ANALYTICS_ORDER_OVERLAP of last_order_id, re-read on every fold
+        self.recent_order_ids: Set[int] = set()
+        self.orders = 0
+        # units sold per item (row) and hour of day (column)
+        self.item_ids = np.empty(0, dtype=np.int64)
+        self.units_by_hour = np.zeros((0, 24), dtype=np.int64)
+        # basket_sizes[n] = number of orders with n units in total
+        self.basket_sizes = np.zeros(1, dtype=np.int64)
+        self.user_ids = np.empty(0, dtype=np.int64)
+        self.user_orders = np.empty(0, dtype=np.int64)
+
+    def fold(self, order_ids: np.ndarray, user_ids: np.ndarray, dates: np.ndarray,
+             item_ids: np.ndarray, quantities: np.ndarray) -> None:
+        """Add one chunk of order lines; every order must be complete in the chunk."""
+        hours = (dates.astype('datetime64[h]') - dates.astype('datetime64[D]')).astype(np.int64)
+
+        chunk_items, item_inverse = np.unique(item_ids, return_inverse=True)
+        new_items = np.setdiff1d(chunk_items, self.item_ids, assume_unique=True)
+        if len(new_items):
+            self.item_ids = np.concatenate([self.item_ids, new_items])
+            self.units_by_hour = np.vstack([self.units_by_hour, np.zeros((len(new_items), 24), dtype=np.int64)])
+        order = np.argsort(self.item_ids)
+        rows = order[np.searchsorted(self.item_ids, chunk_items, sorter=order)][item_inverse]
+        np.add.at(self.units_by_hour, (rows, hours), quantities)
+
+        chunk_orders, first_line, order_inverse = np.unique(order_ids, return_index=True, return_inverse=True)
+        units_per_order = np.bincount(order_inverse, weights=quantities).astype(np.int64)
+        sizes = np.bincount(units_per_order)
+        if len(sizes) > len(self.basket_sizes):
+            self.basket_sizes = np.pad(self.basket_sizes, (0, len(sizes) - len(self.basket_sizes)))
+        self.basket_sizes[:len(sizes)] += sizes
+
+        users, orders_per_user = np.unique(user_ids[first_line], return_counts=True)
+        self.user_ids, self.user_orders = _merge_counts(self.user_ids, self.user_orders, users, orders_per_user)
+        self.orders += len(chunk_orders)
+        self.recent_order_ids.update(chunk_orders.tolist())
+        self.last_order_id = max(self.last_order_id, int(chunk_orders[-1]))
+
+    def summary(self) -> Dict:
+        customers = len(self.user_ids)
+        repeat_customers = int(np.count_nonzero(self.user_orders > 1))
+        return {
+            'start': self.start.isoformat() if self.start else None,
+            'end': self.end.isoformat() if self.end else None,
+            'orders': self.orders,
+            'units_per_item_per_hour': {
+                int(item_id): units.tolist() for item_id, units in zip(self.item_ids, self.units_by_hour)
+            },
+            'basket_size_distribution': {
+                int(size): int(count) for size, count in enumerate(self.basket_sizes) if count
+            },
+            'customers': customers,
+            'repeat_customers': repeat_customers,
+            'repeat_customer_rate': repeat_customers / customers if customers else 0.0,
+        }
+
+
+class SalesAnalytics:
+    """Per-worker cache of SalesWindow aggregates.
+
+    Each call folds in only the orders with ids above the window's high-water
+    mark, loaded as column arrays in chunks of ANALYTICS_CHUNK_SIZE order ids.
+    The last ANALYTICS_ORDER_OVERLAP ids below the mark are read again and
+    orders already folded are skipped, so an order committed after a higher
+    id is still counted. Edits to orders that were already folded in are only
+    picked up by a rebuild (refresh=True).
+    """
+
+    def __init__(self):
+        self._windows: "OrderedDict[Window, SalesWindow]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def report(self, start: Optional[datetime] = None, end: Optional[datetime] = None, refresh: bool = False) -> Dict:
+        with self._lock:
+            window = None if refresh else self._windows.pop((start, end), None)
+            if window is None:
+                window = SalesWindow(start, end)
+            self._fold_new_orders(window)
+            self._windows[(start, end)] = window
+            while len(self._windows) > current_app.config['ANALYTICS_MAX_WINDOWS']:
+                self._windows.popitem(last=False)
+            return window.summary()
+
+    @staticmethod
+    def _fold_new_orders(window: SalesWindow) -> None:
+        chunk_size = current_app.config['ANALYTICS_CHUNK_SIZE']
+        overlap = current_app.config['ANALYTICS_ORDER_OVERLAP']
+        max_id = db.session.query(db.func.max(OrderModel.id)).scalar() or 0
+        after = max(0, window.last_order_id - overlap)
+        while after < max_id:
+            query = db.session.query(
+                OrderModel.id, OrderModel.user_id, OrderModel.order_date, ItemInOrder.item_id, ItemInOrder.quantity
+            ).join(ItemInOrder, ItemInOrder.order_id == OrderModel.id) \
+                .filter(OrderModel.id > after, OrderModel.id <= after + chunk_size)
+            if window.start:
+                query = query.filter(OrderModel.order_date >= window.start)
+            if window.end:
+                query = query.filter(OrderModel.order_date < window.end)
+            rows = [row for row in query.all() if row[0] not in window.recent_order_ids]
+            if rows:
+                order_ids, user_ids, dates, item_ids, quantities = zip(*rows)
+                window.fold(
+                    np.asarray(order_ids, dtype=np.int64),
+                    np.asarray(user_ids, dtype=np.int64),
+                    np.asarray(dates, dtype='datetime64[s]'),
+                    np.asarray(item_ids, dtype=np.int64),
+                    np.asarray(quantities, dtype=np.int64),
+                )
+            after += chunk_size
+        window.last_order_id = max(window.last_order_id, max_id)
+        floor = window.last_order_id - overlap
+        window.recent_order_ids = {_id for _id in window.recent_order_ids if _id > floor}
+
+
+sales_analytics = SalesAnalytics()
@@ -0,0 +1,48 @@
+from typing import Callable
+
+from flask import Flask, Response, jsonify
+
+from db import db
+
+
+def on_commit(callback: Callable[[], None]) -> None:
+    """Run `callback` once the current request's transaction has committed."""
+    db.session.info.setdefault('on_commit', []).append(callback)
+
+
+def on_rollback(callback: Callable[[], None]) -> None:
+    """Run `callback` if the current request's transaction is rolled back instead."""
+    db.session.info.setdefault('on_rollback', []).append(callback)
+
+
+def init_unit_of_work(app: Flask) -> None:
+    """Commit the session exactly once per request, or roll it back.
+
+    Model helpers only stage their changes (add/delete and flush). The
+    transaction is committed after the view returns a successful response and
+    rolled back for error responses and failed commits, which run the
+    on_rollback callbacks; unhandled exceptions never reach after_request and
+    the session is discarded at teardown.
+    """
+
+    @app.after_request
+    def commit_session(response: Response) -> Response:
+        callbacks = db.session.info.pop('on_commit', [])
+        undo = db.session.info.pop('on_rollback', [])
+        if response.status_code >= 400:
+            db.session.rollback()
+            for callback in undo:
+                callback()
+            return response
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            for callback in undo:
+                callback()
+            response = jsonify({'msg': f'fail: {str(e)}'})
+            response.status_code = 500
+            return response
+        for callback in callbacks:
+            callback()
+        return response
@@ -0,0 +1,44 @@
+"""index the hot lookup columns
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns, unique)
+INDEXES = (
+    ('ix_users_email', 'users', ['email'], True),
+    ('ix_items_name', 'items', ['name'], True),
+    ('ix_order_user_id_order_date', 'order', ['user_id', 'order_date'], False),
+    ('ix_item_in_order_order_id', 'item_in_order', ['order_id'], False),
+    ('ix_user_address_user_id', 'user_address', ['user_id'], False),
+    ('ix_block_list_jti', 'block_list', ['jti'], True),
+)
+
+
+def upgrade():
+    # tables built by db.create_all() from the current models already carry
+    # these indexes, so only create the ones that are missing
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for name, table, columns, unique in INDEXES:
+        if table not in tables:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade():
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,40 @@
+"""record token expiry on block_list
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 11:00:00
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'block_list' not in inspector.get_table_names():
+        return
+    if 'expires_at' not in {column['name'] for column in inspector.get_columns('block_list')}:
+        op.add_column('block_list', sa.Column('expires_at', sa.DateTime(), nullable=True))
+        op.create_index('ix_block_list_expires_at', 'block_list', ['expires_at'])
+    # existing rows never recorded their expiry; access tokens live for
+    # minutes, so a day from now is safely past all of them
+    block_list = sa.table('block_list', sa.column('expires_at', sa.DateTime()))
+    op.execute(
+        block_list.update()
+        .where(block_list.c.expires_at.is_(None))
+        .values(expires_at=datetime.utcnow() + timedelta(days=1))
+    )
+
+
+def downgrade():
+    op.drop_index('ix_block_list_expires_at', table_name='block_list')
+    op.drop_column('block_list', 'expires_at')
@@ -0,0 +1,57 @@
+"""snapshot line prices and store order totals
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 13:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    if not {'order', 'item_in_order', 'items'} <= tables:
+        return
+    if 'unit_price' not in {column['name'] for column in inspector.get_columns('item_in_order')}:
+        op.add_column('item_in_order', sa.Column('unit_price', sa.Float(precision=2), nullable=True))
+    if 'total' not in {column['name'] for column in inspector.get_columns('order')}:
+        op.add_column('order', sa.Column('total', sa.Float(precision=2), nullable=False, server_default='0'))
+
+    items = sa.table('items', sa.column('id', sa.Integer()), sa.column('price', sa.Float()))
+    lines = sa.table(
+        'item_in_order',
+        sa.column('order_id', sa.Integer()),
+        sa.column('item_id', sa.Integer()),
+        sa.column('quantity', sa.Integer()),
+        sa.column('unit_price', sa.Float()),
+    )
+    orders = sa.table('order', sa.column('id', sa.Integer()), sa.column('total', sa.Float()))
+    # the price at order time was never recorded; the current price is the
+    # best available snapshot for existing lines
+    op.execute(
+        lines.update()
+        .where(lines.c.unit_price.is_(None))
+        .values(unit_price=sa.select(items.c.price).where(items.c.id == lines.c.item_id).scalar_subquery())
+    )
+    op.execute(
+        orders.update().values(total=sa.func.coalesce(
+            sa.select(sa.func.sum(lines.c.quantity * lines.c.unit_price))
+            .where(lines.c.order_id == orders.c.id)
+            .scalar_subquery(),
+            0,
+        ))
+    )
+
+
+def downgrade():
+    op.drop_column('order', 'total')
+    op.drop_column('item_in_order', 'unit_price')
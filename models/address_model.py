@@ -13,7 +13,7 @@ class AddressModel(db.Model):
     address_detail = db.Column(db.String(255), nullable=False)
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
-    user_id = db.Column(db.Integer(), db.ForeignKey('users.id'))
+    user_id = db.Column(db.Integer(), db.ForeignKey('users.id'), index=True)
 
     @classmethod
     def find_address_by_user(cls, user_id: int) -> "AddressModel":
@@ -23,12 +23,16 @@ class AddressModel(db.Model):
     def find_all(cls) -> List['AddressModel']:
         return cls.query.all()
 
+    @classmethod
+    def find_page(cls, after: int, limit: int) -> List["AddressModel"]:
+        return cls.query.filter(cls.id > after).order_by(cls.id).limit(limit).all()
+
     def save_address(self) -> None:
         db.session.add(self)
-        db.session.commit()
+        db.session.flush()
 
     def delete_address(self) -> None:
         db.session.delete(self)
-        db.session.commit()
+        db.session.flush()
 
 
@@ -1,3 +1,8 @@
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy.dialects import postgresql
+
 from db import db
 
 
@@ -5,15 +10,43 @@ class BlockListModel(db.Model):
     __tablename__ = "block_list"
 
     id = db.Column(db.Integer, primary_key=True)
-    jti = db.Column(db.String(36), nullable=False)
+    jti = db.Column(db.String(36), nullable=False, unique=True, index=True)
+    # expiry of the revoked token (UTC); the row is useless once it has passed
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)
 
-    def __init__(self, jti):
+    def __init__(self, jti, expires_at=None):
         self.jti = jti
+        self.expires_at = expires_at
+
+    @classmethod
+    def _live(cls):
+        return db.or_(cls.expires_at.is_(None), cls.expires_at > datetime.utcnow())
 
     @classmethod
     def find_jti(cls, jti):
-        return cls.query.filter_by(jti=jti).scalar()
+        return cls.query.filter(cls.jti == jti, cls._live()).scalar()
+
+    @classmethod
+    def find_since(cls, last_id: int) -> List[Tuple[int, str, datetime]]:
+        return cls.query.with_entities(cls.id, cls.jti, cls.expires_at) \
+            .filter(cls.id > last_id, cls._live()).order_by(cls.id).all()
+
+    @classmethod
+    def bulk_insert(cls, entries: List[Tuple[str, datetime]]) -> None:
+        """Insert revoked JTIs, skipping any that are already stored (e.g. a retried logout)."""
+        rows = list({jti: {'jti': jti, 'expires_at': expires_at} for jti, expires_at in entries}.values())
+        if db.session.get_bind().dialect.name == 'postgresql':
+            statement = postgresql.insert(cls.__table__).on_conflict_do_nothing(index_elements=['jti'])
+        else:
+            statement = cls.__table__.insert() \
+                .prefix_with('IGNORE', dialect='mysql') \
+                .prefix_with('OR IGNORE', dialect='sqlite')
+        db.session.execute(statement, rows)
+
+    @classmethod
+    def delete_expired(cls) -> int:
+        return cls.query.filter(cls.expires_at <= datetime.utcnow()).delete(synchronize_session=False)
 
     def save_jti(self):
         db.session.add(self)
-        db.session.commit()
+        db.session.flush()
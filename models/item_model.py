@@ -1,16 +1,28 @@
-from typing import List
+from typing import Dict, Iterable, List
 
 from db import db
+from libs.catalog_cache import catalog_cache
+from libs.catalog_search import IndexedItem, catalog_index
+from libs.image_store import image_store, item_folder
+from libs.unit_of_work import on_commit
 
 
 class ItemModel(db.Model):
     __tablename__ = "items"
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(128), nullable=False)
+    name = db.Column(db.String(128), nullable=False, unique=True, index=True)
     price = db.Column(db.Float(precision=2), nullable=False)
     image = db.Column(db.String(255), nullable=True)
     desc = db.Column(db.String(500), nullable=False)
+
+    @property
+    def image_variants(self) -> Dict[str, str]:
+        return image_store.rendered_variants(self.image)
+
+    @property
+    def images(self) -> List[str]:
+        return image_store.images_for(item_folder(self.id))
     
     @classmethod
     def find_item_by_id(cls, _id: int) -> "ItemModel":
@@ -20,14 +32,28 @@ class ItemModel(db.Model):
     def find_item_by_name(cls, name: str) -> "ItemModel":
         return cls.query.filter_by(name=name).first()
 
+    @classmethod
+    def find_prices(cls, ids: Iterable[int]) -> Dict[int, float]:
+        return dict(cls.query.with_entities(cls.id, cls.price).filter(cls.id.in_(list(ids))))
+
     @classmethod
     def find_all(cls) -> List['ItemModel']:
         return cls.query.all()
+
+    @classmethod
+    def find_page(cls, after: int, limit: int) -> List["ItemModel"]:
+        return cls.query.filter(cls.id > after).order_by(cls.id).limit(limit).all()
     
     def save_item(self):
         db.session.add(self)
-        db.session.commit()
+        db.session.flush()
+        indexed = IndexedItem(self.id, self.name, self.price, self.image, self.desc)
+        on_commit(catalog_cache.invalidate)
+        on_commit(lambda: catalog_index.upsert(indexed))
         
     def delete_item(self):
         db.session.delete(self)
-        db.session.commit()
+        db.session.flush()
+        item_id = self.id
+        on_commit(catalog_cache.invalidate)
+        on_commit(lambda: catalog_index.remove(item_id))
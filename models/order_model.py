@@ -1,26 +1,48 @@
-from typing import List
+from datetime import datetime
+from typing import Dict, List, Optional
 
 from db import db
 
+# target state -> (flag it sets, flag that must already be set)
+ORDER_TRANSITIONS = {
+    'packed': ('is_packed', None),
+    'shipped': ('is_shipped', 'is_packed'),
+    'delivered': ('is_delivered', 'is_shipped'),
+}
+
 
 class ItemInOrder(db.Model):
     __tablename__ = "item_in_order"
 
     id = db.Column(db.Integer, primary_key=True)
     item_id = db.Column(db.Integer, db.ForeignKey("items.id"))
-    order_id = db.Column(db.Integer, db.ForeignKey("order.id"))
+    order_id = db.Column(db.Integer, db.ForeignKey("order.id"), index=True)
     quantity = db.Column(db.Integer, default=1)
+    # item price when the line was ordered, so later price edits do not change the order
+    unit_price = db.Column(db.Float(precision=2), nullable=True)
 
     item = db.relationship("ItemModel")
     order = db.relationship("OrderModel", back_populates="items")
 
+    @classmethod
+    def bulk_insert(cls, order_id: int, item_quantities: Dict[int, int], prices: Dict[int, float]) -> None:
+        rows = [
+            {'order_id': order_id, 'item_id': _id, 'quantity': count, 'unit_price': prices[_id]}
+            for _id, count in item_quantities.items()
+        ]
+        if rows:
+            db.session.execute(cls.__table__.insert(), rows)
+
     def delete_item_in_order(self) -> None:
         db.session.delete(self)
-        db.session.commit()
+        db.session.flush()
 
 
 class OrderModel(db.Model):
     __tablename__ = "order"
+    __table_args__ = (
+        db.Index("ix_order_user_id_order_date", "user_id", "order_date"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     order_date = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
@@ -29,13 +51,18 @@ class OrderModel(db.Model):
     is_shipped = db.Column(db.Boolean, nullable=False, default=False)
     is_delivered = db.Column(db.Boolean, nullable=False, default=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    total = db.Column(db.Float(precision=2), nullable=False, default=0)
 
-    items = db.relationship("ItemInOrder", lazy="dynamic", back_populates="order")
+    items = db.relationship("ItemInOrder", lazy="selectin", back_populates="order")
 
     @classmethod
     def find_all(cls) -> List["OrderModel"]:
         return cls.query.all()
 
+    @classmethod
+    def find_page(cls, after: int, limit: int) -> List["OrderModel"]:
+        return cls.query.filter(cls.id > after).order_by(cls.id).limit(limit).all()
+
     @classmethod
     def find_order_by_id(cls, order_id: int) -> "OrderModel":
         return cls.query.filter_by(id=order_id).first()
@@ -44,10 +71,108 @@ class OrderModel(db.Model):
     def find_user_orders(cls, user_id: int) -> List["OrderModel"]:
         return cls.query.filter_by(user_id=user_id).order_by(OrderModel.order_date)
 
+    @classmethod
+    def bulk_transition(cls, order_ids: List[int], state: str) -> Dict[int, str]:
+        """Move every order in `order_ids` to `state` with a single UPDATE.
+
+        Returns the outcome per id: updated, not_found, already_<state> or
+        invalid_transition when the previous state has not been reached yet.
+        """
+        flag, required = ORDER_TRANSITIONS[state]
+        columns = [cls.id, getattr(cls, flag)]
+        if required:
+            columns.append(getattr(cls, required))
+        current = {row[0]: row[1:] for row in cls.query.with_entities(*columns).filter(cls.id.in_(order_ids))}
+        results = {}
+        for _id in order_ids:
+            if _id not in current:
+                results[_id] = 'not_found'
+            elif current[_id][0]:
+                results[_id] = f'already_{state}'
+            elif required and not current[_id][1]:
+                results[_id] = 'invalid_transition'
+            else:
+                results[_id] = 'updated'
+        to_update = [_id for _id, result in results.items() if result == 'updated']
+        if to_update:
+            query = cls.query.filter(cls.id.in_(to_update), getattr(cls, flag).is_(False))
+            if required:
+                query = query.filter(getattr(cls, required).is_(True))
+            query.update({flag: True}, synchronize_session=False)
+        return results
+
+    @classmethod
+    def _in_period(cls, query, start: Optional[datetime], end: Optional[datetime]):
+        if start:
+            query = query.filter(cls.order_date >= start)
+        if end:
+            query = query.filter(cls.order_date < end)
+        return query
+
+    @classmethod
+    def revenue_per_day(cls, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict]:
+        day = db.func.date(cls.order_date)
+        query = db.session.query(day, db.func.count(cls.id), db.func.sum(cls.total))
+        rows = cls._in_period(query, start, end).group_by(day).order_by(day)
+        return [{'day': str(_day), 'orders': orders, 'revenue': revenue} for _day, orders, revenue in rows]
+
+    @classmethod
+    def revenue_per_user(cls, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict]:
+        revenue = db.func.sum(cls.total)
+        query = db.session.query(cls.user_id, db.func.count(cls.id), revenue)
+        rows = cls._in_period(query, start, end).group_by(cls.user_id).order_by(revenue.desc())
+        return [{'user_id': user_id, 'orders': orders, 'revenue': _revenue} for user_id, orders, _revenue in rows]
+
+    @classmethod
+    def revenue_per_item(cls, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict]:
+        revenue = db.func.sum(ItemInOrder.quantity * ItemInOrder.unit_price)
+        # SUM of an integer column is a DECIMAL on MySQL, which the JSON encoder rejects
+        units = db.cast(db.func.sum(ItemInOrder.quantity), db.Integer)
+        query = db.session.query(ItemInOrder.item_id, units, revenue) \
+            .join(cls, ItemInOrder.order_id == cls.id)
+        rows = cls._in_period(query, start, end).group_by(ItemInOrder.item_id).order_by(revenue.desc())
+        return [{'item_id': item_id, 'units': units, 'revenue': _revenue} for item_id, units, _revenue in rows]
+
     def save_order(self):
         db.session.add(self)
-        db.session.commit()
+        db.session.flush()
+
+    def save_order_with_items(self, item_quantities: Dict[int, int], prices: Dict[int, float]) -> None:
+        self.total = sum(count * prices[_id] for _id, count in item_quantities.items())
+        db.session.add(self)
+        db.session.flush()
+        ItemInOrder.bulk_insert(self.id, item_quantities, prices)
+
+    def update_items(self, item_quantities: Dict[int, int], prices: Dict[int, float]) -> None:
+        """Bring the order lines in line with `item_quantities`, writing only the delta.
+
+        Lines that disappear (or drop to 0) are deleted, changed quantities are
+        updated and new items inserted at `prices`, each as one bulk statement.
+        Existing lines keep their snapshotted unit price; the total is recomputed.
+        """
+        current = {line.item_id: line for line in self.items}
+        unit_prices = {item_id: line.unit_price or 0 for item_id, line in current.items()}
+        unit_prices.update(prices)
+        removed = [line.id for item_id, line in current.items() if item_quantities.get(item_id, 0) <= 0]
+        changed = [
+            {'id': line.id, 'quantity': item_quantities[item_id]}
+            for item_id, line in current.items()
+            if item_quantities.get(item_id, 0) > 0 and item_quantities[item_id] != line.quantity
+        ]
+        added = {
+            item_id: count for item_id, count in item_quantities.items()
+            if item_id not in current and count > 0
+        }
+        if removed:
+            ItemInOrder.query.filter(ItemInOrder.id.in_(removed)).delete(synchronize_session=False)
+        if changed:
+            db.session.bulk_update_mappings(ItemInOrder, changed)
+        ItemInOrder.bulk_insert(self.id, added, prices)
+        self.total = sum(count * unit_prices[item_id] for item_id, count in item_quantities.items() if count > 0)
+        for line in current.values():
+            db.session.expire(line)
+        db.session.expire(self, ['items'])
 
     def delete_order(self):
         db.session.delete(self)
-        db.session.commit()
+        db.session.flush()
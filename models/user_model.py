@@ -1,6 +1,7 @@
-from typing import List
+from typing import Dict, List
 
 from db import db
+from libs.image_store import image_store
 from models.address_model import AddressModel
 
 
@@ -9,7 +10,7 @@ class UserModel(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(255), nullable=False)
-    email = db.Column(db.String(255), nullable=False)
+    email = db.Column(db.String(255), nullable=False, unique=True, index=True)
     phone = db.Column(db.String(10), nullable=False)
     password = db.Column(db.String(255), nullable=False)
     user_image = db.Column(db.String(255), nullable=True)
@@ -20,6 +21,10 @@ class UserModel(db.Model):
 
     address = db.relationship("AddressModel", lazy="dynamic")
 
+    @property
+    def user_image_variants(self) -> Dict[str, str]:
+        return image_store.rendered_variants(self.user_image)
+
     "applied codes model - one tp many"
     "orders model one to many"
     "confirmations model one to many"
@@ -36,10 +41,14 @@ class UserModel(db.Model):
     def find_all(cls) -> List['UserModel']:
         return cls.query.all()
 
+    @classmethod
+    def find_page(cls, after: int, limit: int) -> List["UserModel"]:
+        return cls.query.filter(cls.id > after).order_by(cls.id).limit(limit).all()
+
     def save_user(self):
         db.session.add(self)
-        db.session.commit()
+        db.session.flush()
 
     def delete_user(self):
         db.session.delete(self)
-        db.session.commit()
+        db.session.flush()
@@ -5,11 +5,14 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from flask_restful import Resource
 
 from db import db
+from libs.export import ndjson_response
+from libs.fast_dump import FastDumper
+from libs.pagination import get_page_args, next_cursor
 from models.address_model import AddressModel
 from schemas.address_schema import AddressSchema
 
 address_schema = AddressSchema()
-address_list = AddressSchema(many=True)
+address_dumper = FastDumper(address_schema)
 
 
 class UserAddress(Resource):
@@ -28,7 +31,7 @@ class UserAddress(Resource):
                 return address_schema.dump(user_address), 201
             except Exception as e:
                 traceback.print_exc()
-                return {'msg': str(e)}
+                return {'msg': str(e)}, 500
         if data['state']:
             address.state = data['state']
         if data['city']:
@@ -49,4 +52,17 @@ class AddressList(Resource):
         claim = get_jwt()
         if not claim['is_admin']:
             return {'msg': 'fail: user not admin'}, 400
-        return {'address': address_list.dump(AddressModel.find_all())}
+        after, limit = get_page_args()
+        addresses = AddressModel.find_page(after, limit)
+        return {'address': address_dumper.dump(addresses, many=True), 'next': next_cursor(addresses, limit)}
+
+
+class AddressExport(Resource):
+
+    @classmethod
+    @jwt_required()
+    def get(cls):
+        claim = get_jwt()
+        if not claim['is_admin']:
+            return {'msg': 'fail: user not admin'}, 400
+        return ndjson_response(AddressModel, address_dumper)
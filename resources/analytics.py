@@ -0,0 +1,25 @@
+from flask import request
+from flask_jwt_extended import jwt_required, get_jwt
+from flask_restful import Resource
+
+from libs.period import get_period_args
+from libs.sales_analytics import sales_analytics
+
+
+class SalesAnalytics(Resource):
+
+    @classmethod
+    @jwt_required()
+    def get(cls):
+        try:
+            claim = get_jwt()
+            if not claim['is_admin']:
+                return {'msg': 'fail: user is not admin'}, 400
+            try:
+                start, end = get_period_args()
+            except ValueError as e:
+                return {'msg': str(e)}, 400
+            refresh = request.args.get('refresh', '') in ('1', 'true')
+            return sales_analytics.report(start, end, refresh), 200
+        except Exception as e:
+            return {'msg': f'fail: {str(e)}'}, 500
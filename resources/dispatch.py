@@ -0,0 +1,18 @@
+from flask_jwt_extended import jwt_required, get_jwt
+from flask_restful import Resource
+
+from libs.dispatch import plan_dispatch
+
+
+class Dispatch(Resource):
+
+    @classmethod
+    @jwt_required()
+    def get(cls):
+        try:
+            claim = get_jwt()
+            if not claim['is_admin']:
+                return {'msg': 'fail: user is not admin'}, 400
+            return plan_dispatch(), 200
+        except Exception as e:
+            return {'msg': f'fail: {str(e)}'}, 500
@@ -2,12 +2,14 @@ import os
 import uuid
 from time import time
 
-from flask import request
+from flask import abort, current_app, request, send_from_directory
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from flask_restful import Resource
 from flask_uploads import UploadNotAllowed
 
-from libs.image_helper import save_image
+from libs.image_store import image_store, item_folder, user_folder
+from libs.image_variants import schedule_variants
+from libs.unit_of_work import on_commit, on_rollback
 from models.item_model import ItemModel
 from models.user_model import UserModel
 from schemas.image_schema import ImageSchema
@@ -15,6 +17,20 @@ from schemas.image_schema import ImageSchema
 image_schema = ImageSchema()
 
 
+def _replace_image_on_commit(old_path: str, new_path: str) -> None:
+    """Swap in an uploaded image once its new path is committed.
+
+    On commit the variants of the new image are rendered and the replaced
+    image is deleted. On rollback the new file is deleted instead, unless it
+    overwrote the old one in place and the committed row still points at it.
+    """
+    on_commit(lambda: schedule_variants(new_path))
+    if old_path != new_path:
+        on_rollback(lambda: image_store.delete(new_path))
+        if old_path:
+            on_commit(lambda: image_store.delete(old_path))
+
+
 class UserAvatar(Resource):
 
     @classmethod
@@ -23,19 +39,19 @@ class UserAvatar(Resource):
         image_data = image_schema.load(request.files)
         try:
             user_id = get_jwt_identity()
-            folder = f"user_{user_id}"
-            image_path = save_image(image_data['image'], folder=folder, name="avatar.")
+            image_path = image_store.save(image_data['image'], folder=user_folder(user_id), name="avatar.")
             user = UserModel.find_user_by_id(user_id)
             if user:
+                _replace_image_on_commit(user.user_image, image_path)
                 user.user_image = image_path
                 user.save_user()
                 return {'msg': 'success: image uploaded'}, 201
-            os.unlink('static/images/'+image_path)
+            image_store.delete(image_path)
             return {'msg': 'fail: user not found'}, 404
         except UploadNotAllowed:
             return {'msg': 'fail: upload not allowed'}, 400
         except Exception as e:
-            return {'msg': f'fail:{str(e)}'}
+            return {'msg': f'fail:{str(e)}'}, 500
 
     @jwt_required()
     def put(self, path: str):
@@ -53,16 +69,16 @@ class ItemImage(Resource):
             item = ItemModel.find_item_by_id(item_id)
             if not item:
                 return {'msg': 'fail: item not found'}, 404
-            folder = f"items/item_{item.id}"
             name = f"{uuid.uuid4().hex}_{int(time())}."
-            image_path = save_image(image_data['image'], folder=folder, name=name)
+            image_path = image_store.save(image_data['image'], folder=item_folder(item.id), name=name)
+            _replace_image_on_commit(item.image, image_path)
             item.image = image_path
             item.save_item()
             return {'msg': 'success: image uploaded'}, 201
         except UploadNotAllowed:
             return {'msg': 'fail: upload not allowed'}, 400
         except Exception as e:
-            return {'msg': f'fail:{str(e)}'}
+            return {'msg': f'fail:{str(e)}'}, 500
 
     @jwt_required()
     def put(self, path: str):
@@ -76,14 +92,17 @@ class DeleteAvatarImage(Resource):
         user_id = get_jwt_identity()
         user = UserModel.find_user_by_id(user_id)
         print()
-        image_path = f'static/images/user_{user_id}/{path}'
+        image_path = f'{user_folder(user_id)}/{path}'
+        if not image_store.contains(image_path):
+            return {'msg': 'fail: image not found'}, 404
         try:
-            os.unlink(image_path)
             user.user_image = None
             user.save_user()
+            # unlink only once the row no longer points at the file
+            on_commit(lambda: image_store.delete(image_path))
             return {'msg': 'image deleted'}, 200
         except Exception as e:
-            return {'msg': f'fail: {str(e)}'}
+            return {'msg': f'fail: {str(e)}'}, 500
 
 
 class DeleteItemImage(Resource):
@@ -97,11 +116,34 @@ class DeleteItemImage(Resource):
         item = ItemModel.find_item_by_id(item_id)
         if not item:
             return {'msg': 'fail: item not found'}, 404
-        image_path = f'static/images/items/item_{item_id}/{img_name}'
+        image_path = f'{item_folder(item_id)}/{img_name}'
+        if not image_store.contains(image_path):
+            return {'msg': 'fail: image not found'}, 404
         try:
-            os.unlink(image_path)
             item.image = None
             item.save_item()
+            on_commit(lambda: image_store.delete(image_path))
             return {'msg': 'image deleted'}, 200
         except Exception as e:
-            return {'msg': f'fail: {str(e)}'}
+            return {'msg': f'fail: {str(e)}'}, 500
+
+
+class ImageFile(Resource):
+
+    @classmethod
+    def get(cls, image_path: str):
+        # only indexed images and variants are served, never in-flight uploads
+        if not image_store.contains(image_path):
+            abort(404)
+        directory = os.path.abspath(current_app.config['UPLOADED_IMAGES_DEST'])
+        # item images get a fresh uuid name on every upload, so they never
+        # change once written; avatars reuse their name and must revalidate
+        immutable = image_path.startswith('items/')
+        if immutable:
+            max_age = current_app.config['IMAGE_CACHE_SECONDS']
+        else:
+            max_age = current_app.config['AVATAR_CACHE_SECONDS']
+        response = send_from_directory(directory, image_path, conditional=True, max_age=max_age)
+        response.cache_control.public = True
+        response.cache_control.immutable = immutable
+        return response
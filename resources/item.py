@@ -1,11 +1,16 @@
-from flask import request
+from flask import Response, request
 from flask_jwt_extended import jwt_required, get_jwt
 from flask_restful import Resource
 
+from libs.catalog_cache import catalog_cache
+from libs.catalog_search import SORTS, catalog_index
+from libs.fast_dump import FastDumper
+from libs.pagination import get_page_args, next_cursor
 from models.item_model import ItemModel
 from schemas.item_schema import ItemSchema
 
 item_schema = ItemSchema()
+item_dumper = FastDumper(item_schema)
 
 
 class RegisterItem(Resource):
@@ -67,4 +72,31 @@ class ItemList(Resource):
         claim = get_jwt()
         if not claim['is_admin']:
             return {'msg': 'user not admin'}, 400
-        return {'items': item_schema.dump(ItemModel.find_all(), many=True)}
+        after, limit = get_page_args()
+        body, etag = catalog_cache.get_or_build(('items', after, limit), lambda: cls._build_page(after, limit))
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+    @classmethod
+    def _build_page(cls, after: int, limit: int) -> dict:
+        items = ItemModel.find_page(after, limit)
+        return {'items': item_dumper.dump(items, many=True), 'next': next_cursor(items, limit)}
+
+
+class ItemSearch(Resource):
+    @classmethod
+    @jwt_required()
+    def get(cls):
+        sort = request.args.get('sort', 'relevance')
+        if sort not in SORTS:
+            return {'msg': f"fail: sort must be one of {', '.join(SORTS)}"}, 400
+        _, limit = get_page_args()
+        items = catalog_index.search(
+            request.args.get('q', ''),
+            min_price=request.args.get('min_price', type=float),
+            max_price=request.args.get('max_price', type=float),
+            sort=sort,
+            limit=limit,
+        )
+        return {'items': items}, 200
@@ -0,0 +1,15 @@
+from flask_jwt_extended import jwt_required, get_jwt
+from flask_restful import Resource
+
+from libs.metrics import metrics_response
+
+
+class Metrics(Resource):
+
+    @classmethod
+    @jwt_required()
+    def get(cls):
+        claim = get_jwt()
+        if not claim['is_admin']:
+            return {'msg': 'fail: user is not admin'}, 400
+        return metrics_response()
@@ -1,14 +1,33 @@
 from collections import Counter
+from typing import Dict, Iterable, List, Tuple
 
-from flask import request
+from flask import current_app, request
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from flask_restful import Resource
 
+from libs.db_routing import read_primary
+from libs.export import ndjson_response
+from libs.fast_dump import FastDumper
+from libs.pagination import get_page_args, next_cursor
+from libs.period import get_period_args
 from models.item_model import ItemModel
-from models.order_model import ItemInOrder, OrderModel
+from models.order_model import ORDER_TRANSITIONS, OrderModel
 from schemas.order_schema import OrderSchema
 
 order_schema = OrderSchema()
+order_dumper = FastDumper(order_schema)
+
+
+def _find_prices(item_ids: Iterable[int]) -> Tuple[Dict[int, float], List[int]]:
+    """Current prices of `item_ids` plus the ids that do not exist."""
+    item_ids = list(item_ids)
+    prices = ItemModel.find_prices(item_ids) if item_ids else {}
+    return prices, [_id for _id in item_ids if _id not in prices]
+
+
+def _is_order_id(value) -> bool:
+    # bool is an int subclass, and int() would accept strings and floats
+    return isinstance(value, int) and not isinstance(value, bool)
 
 
 class Order(Resource):
@@ -18,18 +37,15 @@ class Order(Resource):
         try:
             data = request.get_json()
             user_id = get_jwt_identity()
-            items = []
-            item_id_quantity = Counter(data['items'])
-            for _id, count in item_id_quantity.most_common():
-                item = ItemModel.find_item_by_id(_id)
-                if not item:
-                    return {'msg': 'fail: item not found'}, 404
-                items.append(ItemInOrder(item_id=_id, quantity=count))
-            order = OrderModel(items=items, user_id=user_id)
-            order.save_order()
+            item_id_quantity = Counter(int(_id) for _id in data['items'])
+            prices, missing = _find_prices(item_id_quantity)
+            if missing:
+                return {'msg': 'fail: items not found', 'missing_items': missing}, 404
+            order = OrderModel(user_id=user_id)
+            order.save_order_with_items(dict(item_id_quantity.most_common()), prices)
             return order_schema.dump(order), 200
         except Exception as e:
-            return {'msg': f'fail: {str(e)}'}
+            return {'msg': f'fail: {str(e)}'}, 500
 
 
 class UpdateOrder(Resource):
@@ -38,23 +54,42 @@ class UpdateOrder(Resource):
     def put(cls, order_id):
         try:
             order = OrderModel.find_order_by_id(order_id)
-            if not order:
+            if not order or order.user_id != get_jwt_identity():
                 return {'msg': 'fail: order not fond'}, 404
-            for item in order.items:
-                item.delete_item_in_order()
             data = request.get_json()
-            items = []
-            item_id_quantity = Counter(data['items'])
-            for _id, count in item_id_quantity.most_common():
-                item = ItemModel.find_item_by_id(_id)
-                if not item:
-                    return {'msg': 'fail: item not found'}, 404
-                items.append(ItemInOrder(item_id=_id, quantity=count))
-            order.items = items
-            order.save_order()
+            item_id_quantity = Counter(int(_id) for _id in data['items'])
+            ordered = {line.item_id for line in order.items}
+            prices, missing = _find_prices(_id for _id in item_id_quantity if _id not in ordered)
+            if missing:
+                return {'msg': 'fail: items not found', 'missing_items': missing}, 404
+            order.update_items(item_id_quantity, prices)
             return order_schema.dump(order), 200
         except Exception as e:
-            return {'msg': f'fail: {str(e)}'}
+            return {'msg': f'fail: {str(e)}'}, 500
+
+
+class OrderLine(Resource):
+    @classmethod
+    @jwt_required()
+    def patch(cls, order_id: int, item_id: int):
+        try:
+            order = OrderModel.find_order_by_id(order_id)
+            if not order or order.user_id != get_jwt_identity():
+                return {'msg': 'fail: order not fond'}, 404
+            quantity = int(request.get_json()['quantity'])
+            if quantity < 0:
+                return {'msg': 'fail: quantity must not be negative'}, 400
+            item_quantities = {line.item_id: line.quantity for line in order.items}
+            prices = {}
+            if quantity and item_id not in item_quantities:
+                prices, missing = _find_prices([item_id])
+                if missing:
+                    return {'msg': 'fail: items not found', 'missing_items': missing}, 404
+            item_quantities[item_id] = quantity
+            order.update_items(item_quantities, prices)
+            return order_schema.dump(order), 200
+        except Exception as e:
+            return {'msg': f'fail: {str(e)}'}, 500
 
 
 class DeleteOrder(Resource):
@@ -70,11 +105,12 @@ class DeleteOrder(Resource):
             order.delete_order()
             return {'msg': 'success: order deleted'}, 200
         except Exception as e:
-            return {'msg': f'fail: {str(e)}'}
+            return {'msg': f'fail: {str(e)}'}, 500
 
 
 class OrderIsPacked(Resource):
     @classmethod
+    @read_primary
     @jwt_required()
     def get(cls, order_id: int):
         try:
@@ -88,11 +124,12 @@ class OrderIsPacked(Resource):
             order.save_order()
             return {'msg': 'success: order is packed'}, 200
         except Exception as e:
-            return {'msg': f'fail: {str(e)}'}
+            return {'msg': f'fail: {str(e)}'}, 500
 
 
 class OrderIsShipped(Resource):
     @classmethod
+    @read_primary
     @jwt_required()
     def get(cls, order_id: int):
         try:
@@ -106,11 +143,12 @@ class OrderIsShipped(Resource):
             order.save_order()
             return {'msg': 'success: order is shipped'}, 200
         except Exception as e:
-            return {'msg': f'fail: {str(e)}'}
+            return {'msg': f'fail: {str(e)}'}, 500
 
 
 class OrderIsDelivered(Resource):
     @classmethod
+    @read_primary
     @jwt_required()
     def get(cls, order_id: int):
         try:
@@ -124,7 +162,30 @@ class OrderIsDelivered(Resource):
             order.save_order()
             return {'msg': 'success: order is delivered'}, 200
         except Exception as e:
-            return {'msg': f'fail: {str(e)}'}
+            return {'msg': f'fail: {str(e)}'}, 500
+
+
+class OrdersStatus(Resource):
+    @classmethod
+    @jwt_required()
+    def put(cls):
+        try:
+            claim = get_jwt()
+            if not claim['is_admin']:
+                return {'msg': 'fail: user is not admin'}, 400
+            data = request.get_json()
+            state = data['state']
+            if state not in ORDER_TRANSITIONS:
+                return {'msg': f"fail: state must be one of {', '.join(ORDER_TRANSITIONS)}"}, 400
+            order_ids = data.get('order_ids')
+            if not isinstance(order_ids, list) or not all(_is_order_id(_id) for _id in order_ids):
+                return {'msg': 'fail: order_ids must be a list of integer order ids'}, 400
+            if len(order_ids) > current_app.config['MAX_BULK_ORDER_IDS']:
+                return {'msg': f"fail: at most {current_app.config['MAX_BULK_ORDER_IDS']} orders per request"}, 400
+            results = OrderModel.bulk_transition(order_ids, state)
+            return {'results': [{'order_id': _id, 'result': result} for _id, result in results.items()]}, 200
+        except Exception as e:
+            return {'msg': f'fail: {str(e)}'}, 500
 
 
 class UserOrders(Resource):
@@ -134,9 +195,9 @@ class UserOrders(Resource):
     def get(cls):
         try:
             user_id = get_jwt_identity()
-            return {'orders': order_schema.dump(OrderModel.find_user_orders(user_id=user_id), many=True)}, 200
+            return {'orders': order_dumper.dump(OrderModel.find_user_orders(user_id=user_id), many=True)}, 200
         except Exception as e:
-            return {'msg': f'fail: {str(e)}'}
+            return {'msg': f'fail: {str(e)}'}, 500
 
 
 class OrdersList(Resource):
@@ -148,6 +209,45 @@ class OrdersList(Resource):
             claim = get_jwt()
             if not claim['is_admin']:
                 return {'msg': 'fail: user is not admin'}, 400
-            return {'orders': order_schema.dump(OrderModel.find_all(), many=True)}, 200
+            after, limit = get_page_args()
+            orders = OrderModel.find_page(after, limit)
+            return {'orders': order_dumper.dump(orders, many=True), 'next': next_cursor(orders, limit)}, 200
+        except Exception as e:
+            return {'msg': f'fail: {str(e)}'}, 500
+
+
+class OrdersExport(Resource):
+
+    @classmethod
+    @jwt_required()
+    def get(cls):
+        claim = get_jwt()
+        if not claim['is_admin']:
+            return {'msg': 'fail: user is not admin'}, 400
+        return ndjson_response(OrderModel, order_dumper)
+
+
+class RevenueReport(Resource):
+    REPORTS = {
+        'day': OrderModel.revenue_per_day,
+        'user': OrderModel.revenue_per_user,
+        'item': OrderModel.revenue_per_item,
+    }
+
+    @classmethod
+    @jwt_required()
+    def get(cls):
+        try:
+            claim = get_jwt()
+            if not claim['is_admin']:
+                return {'msg': 'fail: user is not admin'}, 400
+            by = request.args.get('by', 'day')
+            if by not in cls.REPORTS:
+                return {'msg': f"fail: by must be one of {', '.join(cls.REPORTS)}"}, 400
+            try:
+                start, end = get_period_args()
+            except ValueError as e:
+                return {'msg': str(e)}, 400
+            return {'by': by, 'rows': cls.REPORTS[by](start, end)}, 200
         except Exception as e:
-            return {'msg': f'fail: {str(e)}'}
+            return {'msg': f'fail: {str(e)}'}, 500
@@ -1,17 +1,22 @@
 import traceback
+from datetime import datetime
 
 from flask import request
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
 from flask_restful import Resource
 from hmac import compare_digest
 
-from models.address_model import AddressModel
-from models.blocklist_model import BlockListModel
+from libs.blocklist_cache import blocklist_cache
+from libs.blocklist_writer import blocklist_writer
+from libs.db_routing import read_primary
+from libs.export import ndjson_response
+from libs.fast_dump import FastDumper
+from libs.pagination import get_page_args, next_cursor
 from models.user_model import UserModel
-from schemas.address_schema import AddressSchema
 from schemas.user_schema import UserSchema
 
 user_schema = UserSchema()
+user_dumper = FastDumper(user_schema)
 
 
 USER_ALREADY_REGISTER = "FAIL: User Already Register"
@@ -39,7 +44,7 @@ class RegisterUser(Resource):
                 }, 201
             return {'msg': USER_ALREADY_REGISTER}, 400
         except Exception as e:
-            return {'msg': f'fail: {str(e)}'}
+            return {'msg': f'fail: {str(e)}'}, 500
 
 
 class UserLogin(Resource):
@@ -82,12 +87,14 @@ class RefreshToken(Resource):
 class UserLogout(Resource):
 
     @classmethod
+    @read_primary
     @jwt_required()
     def get(cls):
         try:
-            jti = get_jwt()['jti']
-            block_jti = BlockListModel(jti=jti)
-            block_jti.save_jti()
+            claims = get_jwt()
+            expires_at = datetime.utcfromtimestamp(claims['exp'])
+            blocklist_cache.add(claims['jti'], expires_at)
+            blocklist_writer.enqueue(claims['jti'], expires_at)
             return {'msg': USER_LOGGED_OUT}, 200
         except Exception as e:
             return {'msg': str(e)}, 500
@@ -137,6 +144,18 @@ class UsersList(Resource):
             claim = get_jwt()
             if not claim['is_admin']:
                 return {'msg': 'fail: user is not admin'}, 400
-            return {'users': user_schema.dump(UserModel.find_all(), many=True)}, 200
+            after, limit = get_page_args()
+            users = UserModel.find_page(after, limit)
+            return {'users': user_dumper.dump(users, many=True), 'next': next_cursor(users, limit)}, 200
         except Exception as e:
             return {'msg': str(e)}, 500
+
+
+class UsersExport(Resource):
+    @classmethod
+    @jwt_required()
+    def get(cls):
+        claim = get_jwt()
+        if not claim['is_admin']:
+            return {'msg': 'fail: user is not admin'}, 400
+        return ndjson_response(UserModel, user_dumper)
@@ -1,11 +1,3 @@
-from app import app
-from db import db
-from ma import ma
+from app import create_app
 
-db.init_app(app)
-ma.init_app(app)
-
-
-@app.before_first_request
-def create_tables():
-    db.create_all()
\ No newline at end of file
+app = create_app()
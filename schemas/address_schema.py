@@ -1,8 +1,9 @@
+from libs.metrics import TimedSchemaMixin
 from ma import ma
 from models.address_model import AddressModel
 
 
-class AddressSchema(ma.SQLAlchemyAutoSchema):
+class AddressSchema(TimedSchemaMixin, ma.SQLAlchemyAutoSchema):
     class Meta:
         model = AddressModel
         # load_only = ('',)
@@ -1,8 +1,9 @@
+from libs.metrics import TimedSchemaMixin
 from ma import ma
 from models.order_model import ItemInOrder
 
 
-class ItemInOrderSchema(ma.SQLAlchemyAutoSchema):
+class ItemInOrderSchema(TimedSchemaMixin, ma.SQLAlchemyAutoSchema):
     class Meta:
         model = ItemInOrder
         include_fk = True
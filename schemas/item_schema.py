@@ -1,8 +1,12 @@
+from libs.metrics import TimedSchemaMixin
 from ma import ma
 from models.item_model import ItemModel
 
 
-class ItemSchema(ma.SQLAlchemyAutoSchema):
+class ItemSchema(TimedSchemaMixin, ma.SQLAlchemyAutoSchema):
+    image_variants = ma.Dict(dump_only=True)
+    images = ma.List(ma.String(), dump_only=True)
+
     class Meta:
         model = ItemModel
         # load_only = ('',)
@@ -1,10 +1,12 @@
+from libs.metrics import TimedSchemaMixin
 from ma import ma
 from models.user_model import UserModel
 from schemas.address_schema import AddressSchema
 
 
-class UserSchema(ma.SQLAlchemyAutoSchema):
+class UserSchema(TimedSchemaMixin, ma.SQLAlchemyAutoSchema):
     address = ma.Nested(AddressSchema, many=True)
+    user_image_variants = ma.Dict(dump_only=True)
 
     class Meta:
         model = UserModel
@@ -0,0 +1,113 @@
+import os
+import shutil
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+os.environ['APPLICATION_SETTINGS'] = os.path.join(TESTS_DIR, 'settings.py')
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app  # noqa: E402
+from db import db  # noqa: E402
+from libs.image_store import image_store  # noqa: E402
+from models.item_model import ItemModel  # noqa: E402
+from models.order_model import ItemInOrder, OrderModel  # noqa: E402
+from models.user_model import UserModel  # noqa: E402
+
+ITEM_COUNT = 10
+
+
+@pytest.fixture(scope='session')
+def app():
+    return create_app()
+
+
+@pytest.fixture
+def database(app):
+    """Fresh tables and image folder, ITEM_COUNT items and one admin user (id 1)."""
+    images = app.config['UPLOADED_IMAGES_DEST']
+    shutil.rmtree(images, ignore_errors=True)
+    os.makedirs(images)
+    image_store.load(images, app.config['IMAGE_RESCAN_SECONDS'])
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(ItemModel.__table__.insert(), [
+            {'name': f"item {i}", 'price': i + 0.5, 'desc': f"description of item {i}"}
+            for i in range(1, ITEM_COUNT + 1)
+        ])
+        add_user()
+        db.session.commit()
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app, database):
+    return app.test_client()
+
+
+def add_user(**columns) -> int:
+    user_id = db.session.query(db.func.count(UserModel.id)).scalar() + 1
+    row = {
+        'id': user_id,
+        'full_name': f"User {user_id}",
+        'email': f"user{user_id}@test.local",
+        'phone': '5550000000',
+        'password': 'password',
+    }
+    row.update(columns)
+    db.session.execute(UserModel.__table__.insert(), [row])
+    return user_id
+
+
+def add_orders(user_id: int, count: int, lines: int = 3) -> List[int]:
+    start = datetime(2024, 1, 1)
+    order_ids = []
+    for i in range(count):
+        order = OrderModel(user_id=user_id, order_date=start + timedelta(minutes=i), total=0)
+        db.session.add(order)
+        db.session.flush()
+        ItemInOrder.bulk_insert(
+            order.id,
+            {item_id: 1 + i % 3 for item_id in range(1, lines + 1)},
+            {item_id: item_id + 0.5 for item_id in range(1, lines + 1)},
+        )
+        order_ids.append(order.id)
+    return order_ids
+
+
+def auth_header(app, user_id: int) -> Dict[str, str]:
+    with app.app_context():
+        return {'Authorization': f"Bearer {create_access_token(identity=user_id)}"}
+
+
+@contextmanager
+def recorded_statements(app) -> Iterator[List[str]]:
+    """Collect the SQL statements issued on the primary inside the block."""
+    with app.app_context():
+        engine = db.engine
+    statements = []
+
+    def record(_conn, _cursor, statement, *_):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def count_queries(app, client, url: str, headers: Dict[str, str]) -> int:
+    """Number of SQL statements issued while serving GET `url`, body included."""
+    with recorded_statements(app) as statements:
+        response = client.get(url, headers=headers)
+        response.get_data()
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return len(statements)
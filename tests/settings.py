@@ -0,0 +1,17 @@
+import os
+import tempfile
+
+DEBUG = False
+TESTING = True
+
+SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(tempfile.gettempdir(), "ekmek_test.db")
+
+JWT_SECRET_KEY = "test-jwt-secret"
+# the app uses integer user ids as the token subject
+JWT_VERIFY_SUB = False
+SECRET_KEY = "test-app-secret"
+
+UPLOADED_IMAGES_DEST = os.path.join(tempfile.gettempdir(), "ekmek_test_images")
+
+# keep the blocklist refresh from adding a query to the requests under test
+BLOCKLIST_REFRESH_SECONDS = 3600
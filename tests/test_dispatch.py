@@ -0,0 +1,70 @@
+import heapq
+import random
+
+from libs import dispatch
+from libs.dispatch import Stop, _cluster
+from models.address_model import AddressModel
+from models.order_model import OrderModel
+from tests.conftest import add_orders, add_user, auth_header
+
+PLAN_KEYS = {'depot', 'couriers', 'unassigned', 'unroutable'}
+
+
+def _brute_force_cluster(stops, radius_km, batch_size):
+    unassigned = {stop.order_id: stop for stop in stops}
+    batches = []
+    for seed in sorted(stops, key=lambda stop: (stop.x, stop.y)):
+        if seed.order_id not in unassigned:
+            continue
+        near = [(dispatch._distance((seed.x, seed.y), (stop.x, stop.y)), stop.order_id, stop)
+                for stop in unassigned.values()]
+        batch = [stop for _, _, stop in heapq.nsmallest(batch_size, [entry for entry in near if entry[0] <= radius_km])]
+        for stop in batch:
+            del unassigned[stop.order_id]
+        batches.append(batch)
+    return batches
+
+
+def test_dense_clustering_only_visits_unassigned_stops(monkeypatch):
+    rng = random.Random(7)
+    stops = [Stop(i, 0.0, 0.0, rng.uniform(0, 3), rng.uniform(0, 3)) for i in range(2000)]
+    expected = _brute_force_cluster(stops, 2.0, 15)
+    calls = []
+    distance = dispatch._distance
+    monkeypatch.setattr(dispatch, '_distance', lambda a, b: calls.append(1) or distance(a, b))
+
+    assert _cluster(stops, 2.0, 15) == expected
+    # rescanning assigned stops took about 360k distance computations here
+    assert len(calls) < 50000
+
+
+def test_sparse_stops_stay_in_their_own_batches():
+    stops = [Stop(i, 0.0, 0.0, 10.0 * i, 0.0) for i in range(5)]
+    assert _cluster(stops, 2.0, 15) == [[stop] for stop in stops]
+
+
+def test_plan_has_the_same_keys_in_every_case(app, client, database):
+    admin = auth_header(app, 1)
+
+    empty = client.get('/admin/dispatch', headers=admin).get_json()
+    assert set(empty) == PLAN_KEYS
+    assert empty['depot'] is None
+
+    with app.app_context():
+        customer = add_user()
+        database.session.add(AddressModel(state='s', city='c', street='st', address_detail='d',
+                                          latitude=41.0, longitude=29.0, user_id=customer))
+        order_ids = add_orders(customer, 2)
+        OrderModel.query.filter(OrderModel.id.in_(order_ids)).update({'is_packed': True, 'is_shipped': True})
+        database.session.commit()
+    no_couriers = client.get('/admin/dispatch', headers=admin).get_json()
+    assert set(no_couriers) == PLAN_KEYS
+    assert no_couriers['depot'] == {'latitude': 41.0, 'longitude': 29.0}
+    assert no_couriers['unassigned'][0]['orders'] == order_ids
+
+    with app.app_context():
+        courier = add_user(is_delivery=True)
+        database.session.commit()
+    planned = client.get('/admin/dispatch', headers=admin).get_json()
+    assert set(planned) == PLAN_KEYS
+    assert planned['couriers'] == [{'courier_id': courier, 'batches': no_couriers['unassigned']}]
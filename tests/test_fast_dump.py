@@ -0,0 +1,104 @@
+import os
+from datetime import datetime
+
+import pytest
+from marshmallow import Schema, fields, post_dump
+
+from libs.fast_dump import FastDumper
+from models.address_model import AddressModel
+from models.item_model import ItemModel
+from models.order_model import ItemInOrder, OrderModel
+from models.user_model import UserModel
+from schemas.address_schema import AddressSchema
+from schemas.item_schema import ItemSchema
+from schemas.order_schema import OrderSchema
+from schemas.user_schema import UserSchema
+from tests.conftest import add_orders, add_user
+
+
+def assert_same_dump(schema, obj):
+    assert FastDumper(schema).dump(obj) == schema.dump(obj)
+
+
+@pytest.fixture
+def rows(app, database):
+    with app.app_context():
+        with_image = add_user(user_image='user_2/avatar.png', registered_at=datetime(2024, 5, 6, 7, 8, 9))
+        add_user()  # no image, no addresses
+        database.session.add_all([
+            AddressModel(state='S', city='C', street='1st', address_detail='Door 1',
+                         latitude=41.01, longitude=29.02, user_id=with_image),
+            AddressModel(state='S', city='C', street='2nd', address_detail='Door 2', user_id=with_image),
+        ])
+        add_orders(with_image, 2)
+        database.session.add(OrderModel(user_id=with_image, order_date=datetime(2024, 2, 1), total=0))
+        database.session.add(ItemInOrder(order_id=1, item_id=4, quantity=2, unit_price=None))
+        database.session.get(ItemModel, 1).image = 'items/item_1/photo.png'
+        database.session.commit()
+        # rendered variants are listed by the fast path too
+        folder = os.path.join(app.config['UPLOADED_IMAGES_DEST'], 'user_2')
+        os.makedirs(folder, exist_ok=True)
+        open(os.path.join(folder, 'avatar.png.thumb.webp'), 'wb').close()
+        yield database
+
+
+@pytest.mark.parametrize('schema_class, model', [
+    (OrderSchema, OrderModel),
+    (UserSchema, UserModel),
+    (ItemSchema, ItemModel),
+    (AddressSchema, AddressModel),
+])
+def test_fast_dump_matches_marshmallow_per_row(rows, schema_class, model):
+    schema = schema_class()
+    for obj in model.query.order_by(model.id):
+        assert_same_dump(schema, obj)
+
+
+@pytest.mark.parametrize('schema_class, model', [
+    (OrderSchema, OrderModel),
+    (UserSchema, UserModel),
+    (ItemSchema, ItemModel),
+    (AddressSchema, AddressModel),
+])
+def test_fast_dump_matches_marshmallow_many(rows, schema_class, model):
+    schema = schema_class()
+    objs = model.query.order_by(model.id).all()
+    assert FastDumper(schema).dump(objs, many=True) == schema.dump(objs, many=True)
+
+
+def test_fast_dump_covers_none_datetimes_and_nested(rows):
+    order = FastDumper(OrderSchema()).dump(rows.session.get(OrderModel, 1))
+    assert order['order_date'] == '2024-01-01T00:00:00'
+    assert {line['unit_price'] for line in order['items']} >= {None, 1.5}
+    assert FastDumper(OrderSchema()).dump(rows.session.get(OrderModel, 3))['items'] == []
+
+    users = FastDumper(UserSchema()).dump(UserModel.query.order_by(UserModel.id).all(), many=True)
+    assert users[1]['registered_at'] == '2024-05-06T07:08:09'
+    assert [address['latitude'] for address in users[1]['address']] == [41.01, None]
+    assert users[2]['user_image'] is None and users[2]['address'] == []
+    assert 'password' not in users[1]
+
+
+class _Row:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+
+def test_fast_dump_reads_keyword_attributes():
+    class KeywordSchema(Schema):
+        origin = fields.String(attribute='from')
+        size = fields.Integer(attribute='class')
+
+    row = _Row(**{'from': 'depot', 'class': 3})
+    assert_same_dump(KeywordSchema(), row)
+
+
+def test_fast_dump_runs_dump_hooks():
+    class HookedSchema(Schema):
+        name = fields.String()
+
+        @post_dump
+        def shout(self, data, **kwargs):
+            return {key: value.upper() for key, value in data.items()}
+
+    assert_same_dump(HookedSchema(), _Row(name='bread'))
@@ -0,0 +1,56 @@
+import os
+from concurrent.futures import Future
+
+from libs.catalog_cache import catalog_cache
+from libs.image_store import ImageStore
+from libs.image_variants import _finish
+
+
+def _store(tmp_path) -> ImageStore:
+    (tmp_path / 'user_1').mkdir()
+    (tmp_path / 'user_1' / 'avatar.png').write_bytes(b'png')
+    store = ImageStore()
+    store.load(str(tmp_path), rescan_seconds=5)
+    return store
+
+
+def test_lookups_outside_owner_folders_never_list_directories(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    listed = []
+    monkeypatch.setattr(os, 'listdir', lambda path: listed.append(path) or [])
+
+    for path in ('junk1/a.png', '../x.png', 'user_1/../../x.png', 'items/../a.png'):
+        assert not store.contains(path)
+
+    assert listed == []
+    assert store.contains('user_1/avatar.png')
+
+
+def test_rescan_throttle_map_is_bounded(tmp_path):
+    store = _store(tmp_path)
+    for user_id in range(10000):
+        store.contains(f'user_{user_id}/a.png')
+    assert len(store._scanned_at) <= 4096
+
+
+def test_images_for_lists_originals_of_one_owner(tmp_path):
+    store = _store(tmp_path)
+    (tmp_path / 'user_1' / 'avatar.png.thumb.webp').write_bytes(b'webp')
+    (tmp_path / 'user_1' / 'banner.jpg').write_bytes(b'jpg')
+    store.load(str(tmp_path), rescan_seconds=5)
+
+    assert store.images_for('user_1') == ['user_1/avatar.png', 'user_1/banner.jpg']
+    assert store.images_for('user_2') == []
+    assert store.images_for('..') == []
+
+
+def test_rendered_item_variants_invalidate_the_catalog_cache(database):
+    rendered = Future()
+    rendered.set_result(None)
+    version = catalog_cache._version
+
+    _finish('user_1/avatar.png', rendered)
+    assert catalog_cache._version == version
+
+    _finish('items/item_1/photo.png', rendered)
+    assert catalog_cache._version == version + 1
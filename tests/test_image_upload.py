@@ -0,0 +1,85 @@
+import io
+import os
+
+from PIL import Image
+
+from db import db
+from libs.image_store import image_store
+from resources import image as image_resource
+from tests.conftest import auth_header
+
+
+def _png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4), (200, 120, 40)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def _upload(app, client, body: bytes, filename: str):
+    return client.post('/user/avatar', headers=auth_header(app, 1),
+                       data={'image': (io.BytesIO(body), filename)}, content_type='multipart/form-data')
+
+
+def test_markup_is_rejected_while_the_body_is_read(app, client):
+    page = b'<html><body><script>alert(document.cookie)</script></body></html>'
+    assert _upload(app, client, page, 'avatar.svg').status_code == 415
+    assert _upload(app, client, b'<svg xmlns="http://www.w3.org/2000/svg"/>', 'avatar.svg').status_code == 415
+
+
+def test_svg_extension_is_not_accepted(app, client):
+    assert _upload(app, client, _png(), 'avatar.svg').status_code == 400
+
+
+def test_png_is_saved_and_served(app, client):
+    response = _upload(app, client, _png(), 'avatar.png')
+    assert response.status_code == 201
+    served = client.get('/images/user_1/avatar.png')
+    assert served.status_code == 200
+    assert served.mimetype == 'image/png'
+
+
+def test_existing_svg_is_not_served_by_any_route(app, client):
+    folder = os.path.join(app.config['UPLOADED_IMAGES_DEST'], 'user_1')
+    os.makedirs(folder)
+    with open(os.path.join(folder, 'avatar.svg'), 'wb') as svg:
+        svg.write(b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>')
+    image_store.load(app.config['UPLOADED_IMAGES_DEST'], app.config['IMAGE_RESCAN_SECONDS'])
+
+    # the upload root lives under static/ in production, so Flask's static route must not exist
+    assert 'static' not in app.view_functions
+    assert client.get('/images/user_1/avatar.svg').status_code == 404
+    assert client.get('/static/images/user_1/avatar.svg').status_code == 404
+
+
+def test_deleted_image_stays_on_disk_until_the_commit(app, client, monkeypatch):
+    assert _upload(app, client, _png(), 'avatar.png').status_code == 201
+    path = os.path.join(app.config['UPLOADED_IMAGES_DEST'], 'user_1', 'avatar.png')
+
+    def fail():
+        raise RuntimeError('database is gone')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(db.session, 'commit', fail)
+        assert client.delete('/user/avatar/delete/avatar.png', headers=auth_header(app, 1)).status_code == 500
+    assert os.path.exists(path)
+    assert client.get('/images/user_1/avatar.png').status_code == 200
+
+    assert client.delete('/user/avatar/delete/avatar.png', headers=auth_header(app, 1)).status_code == 200
+    assert not os.path.exists(path)
+
+
+def test_failed_commit_removes_the_upload_and_renders_nothing(app, client, monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(image_resource, 'schedule_variants', scheduled.append)
+
+    def fail():
+        raise RuntimeError('database is gone')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(db.session, 'commit', fail)
+        assert _upload(app, client, _png(), 'avatar.png').status_code == 500
+    assert not os.path.exists(os.path.join(app.config['UPLOADED_IMAGES_DEST'], 'user_1', 'avatar.png'))
+    assert scheduled == []
+
+    assert _upload(app, client, _png(), 'avatar.png').status_code == 201
+    assert scheduled == ['user_1/avatar.png']
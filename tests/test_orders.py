@@ -0,0 +1,164 @@
+import pytest
+from sqlalchemy import event
+
+from models.item_model import ItemModel
+from models.order_model import OrderModel
+from tests.conftest import add_orders, add_user, auth_header, recorded_statements
+
+
+def _set_status(client, admin, **body):
+    return client.put('/admin/orders/status', headers=admin, json=body)
+
+
+@pytest.fixture
+def admin(app, client):
+    return auth_header(app, 1)
+
+
+@pytest.mark.parametrize('order_ids', ['12', [1, '2'], [1.0], [True], None, {'1': 1}])
+def test_bulk_status_rejects_order_ids_that_are_not_a_list_of_ints(app, client, database, admin, order_ids):
+    with app.app_context():
+        add_orders(add_user(), 2)
+        database.session.commit()
+
+    response = _set_status(client, admin, state='packed', order_ids=order_ids)
+
+    assert response.status_code == 400
+    with app.app_context():
+        assert OrderModel.query.filter(OrderModel.is_packed.is_(True)).count() == 0
+
+
+def test_bulk_status_reports_the_outcome_per_order(app, client, database, admin):
+    with app.app_context():
+        packed, fresh, shipped = add_orders(add_user(), 3)
+        OrderModel.query.filter(OrderModel.id.in_([packed, shipped])).update({'is_packed': True})
+        OrderModel.query.filter(OrderModel.id == shipped).update({'is_shipped': True})
+        database.session.commit()
+
+    response = _set_status(client, admin, state='shipped', order_ids=[packed, fresh, shipped, 999])
+
+    assert response.status_code == 200
+    assert response.get_json()['results'] == [
+        {'order_id': packed, 'result': 'updated'},
+        {'order_id': fresh, 'result': 'invalid_transition'},
+        {'order_id': shipped, 'result': 'already_shipped'},
+        {'order_id': 999, 'result': 'not_found'},
+    ]
+    with app.app_context():
+        assert OrderModel.find_order_by_id(packed).is_shipped
+        assert not OrderModel.find_order_by_id(fresh).is_shipped
+
+
+def test_bulk_transition_update_is_guarded_against_concurrent_changes(app, database):
+    with app.app_context():
+        order_ids = add_orders(add_user(), 2)
+        database.session.commit()
+        engine = database.engine
+
+        def unpack_one(_conn, _cursor, statement, *_):
+            # another request un-packs an order between the read and the UPDATE
+            if statement.lstrip().upper().startswith('UPDATE'):
+                _cursor.execute('UPDATE "order" SET is_packed = 0 WHERE id = ?', (order_ids[1],))
+
+        OrderModel.query.filter(OrderModel.id.in_(order_ids)).update({'is_packed': True})
+        database.session.flush()
+        event.listen(engine, 'before_cursor_execute', unpack_one)
+        try:
+            OrderModel.bulk_transition(order_ids, 'shipped')
+        finally:
+            event.remove(engine, 'before_cursor_execute', unpack_one)
+        database.session.commit()
+
+        shipped = {order.id: order.is_shipped for order in OrderModel.query.filter(OrderModel.id.in_(order_ids))}
+        assert shipped == {order_ids[0]: True, order_ids[1]: False}
+
+
+@pytest.fixture
+def customer(app, client, database):
+    """A user with one order of items 1-3 (one each), after item 1 got more expensive."""
+    with app.app_context():
+        user_id = add_user()
+        order_id, = add_orders(user_id, 1)
+        OrderModel.query.filter(OrderModel.id == order_id).update({'total': 1.5 + 2.5 + 3.5})
+        ItemModel.query.filter(ItemModel.id == 1).update({'price': 99.0})
+        database.session.commit()
+    headers = auth_header(app, user_id)
+    # the first authenticated request loads the blocklist
+    client.get('/user/orders', headers=headers)
+    return headers, order_id
+
+
+def _lines(response):
+    return {line['item_id']: (line['quantity'], line['unit_price']) for line in response.get_json()['items']}
+
+
+def _send(app, send):
+    with recorded_statements(app) as statements:
+        response = send()
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response, len(statements)
+
+
+def test_put_writes_only_the_changed_lines(app, client, customer):
+    headers, order_id = customer
+    # item 1 changes, item 2 stays, item 3 is removed and item 4 is added
+    items = [1, 1, 2, 4]
+
+    response, statements = _send(app, lambda: client.put(f'/user/order/update/{order_id}', headers=headers,
+                                                         json={'items': items}))
+
+    # existing lines keep the price they were ordered at, new ones get today's
+    assert _lines(response) == {1: (2, 1.5), 2: (1, 2.5), 4: (1, 4.5)}
+    assert response.get_json()['total'] == 2 * 1.5 + 2.5 + 4.5
+    # order, lines, price of item 4, DELETE, UPDATE line, INSERT, UPDATE total, reload lines
+    assert statements == 8
+
+
+def test_put_of_an_unchanged_order_writes_nothing(app, client, customer):
+    headers, order_id = customer
+
+    response, statements = _send(app, lambda: client.put(f'/user/order/update/{order_id}', headers=headers,
+                                                         json={'items': [1, 2, 3]}))
+
+    assert _lines(response) == {1: (1, 1.5), 2: (1, 2.5), 3: (1, 3.5)}
+    assert response.get_json()['total'] == 1.5 + 2.5 + 3.5
+    # order and its lines, then the lines again for the response
+    assert statements == 3
+
+
+# order and lines, the write, UPDATE total and the reloaded lines; a new item also reads its price
+@pytest.mark.parametrize('item_id, quantity, lines, total, expected_statements', [
+    (2, 5, {1: (1, 1.5), 2: (5, 2.5), 3: (1, 3.5)}, 1.5 + 5 * 2.5 + 3.5, 5),
+    (2, 0, {1: (1, 1.5), 3: (1, 3.5)}, 1.5 + 3.5, 5),
+    (1, 3, {1: (3, 1.5), 2: (1, 2.5), 3: (1, 3.5)}, 3 * 1.5 + 2.5 + 3.5, 5),
+    (5, 2, {1: (1, 1.5), 2: (1, 2.5), 3: (1, 3.5), 5: (2, 5.5)}, 1.5 + 2.5 + 3.5 + 2 * 5.5, 6),
+    # dropping an item that is not in the order writes nothing
+    (6, 0, {1: (1, 1.5), 2: (1, 2.5), 3: (1, 3.5)}, 1.5 + 2.5 + 3.5, 3),
+])
+def test_patch_sets_one_line(app, client, customer, item_id, quantity, lines, total, expected_statements):
+    headers, order_id = customer
+
+    response, statements = _send(app, lambda: client.patch(f'/user/order/{order_id}/item/{item_id}', headers=headers,
+                                                           json={'quantity': quantity}))
+
+    assert _lines(response) == lines
+    assert response.get_json()['total'] == total
+    assert statements == expected_statements
+
+
+@pytest.mark.parametrize('method, url, body', [
+    ('put', '/user/order/update/{order_id}', {'items': [1]}),
+    ('patch', '/user/order/{order_id}/item/1', {'quantity': 5}),
+])
+def test_orders_of_other_users_cannot_be_changed(app, client, customer, method, url, body):
+    _, order_id = customer
+    with app.app_context():
+        other = auth_header(app, add_user())
+        OrderModel.query.session.commit()
+
+    response = getattr(client, method)(url.format(order_id=order_id), headers=other, json=body)
+
+    assert response.status_code == 404
+    with app.app_context():
+        lines = OrderModel.find_order_by_id(order_id).items
+        assert {line.item_id: line.quantity for line in lines} == {1: 1, 2: 1, 3: 1}
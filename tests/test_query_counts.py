@@ -0,0 +1,50 @@
+import pytest
+
+from tests.conftest import add_orders, add_user, auth_header, count_queries
+
+
+@pytest.fixture
+def admin(app, client):
+    headers = auth_header(app, 1)
+    # the first authenticated request loads the blocklist
+    client.get('/admin/orders?limit=1', headers=headers)
+    return headers
+
+
+def test_orders_list_queries_do_not_grow_with_page_size(app, client, database, admin):
+    with app.app_context():
+        add_orders(add_user(), 60)
+        database.session.commit()
+
+    small = count_queries(app, client, '/admin/orders?limit=5', admin)
+    large = count_queries(app, client, '/admin/orders?limit=60', admin)
+
+    # one query for the page and one selectin query for all of its lines
+    assert small == large == 2
+
+
+def test_user_orders_queries_do_not_grow_with_order_count(app, client, database, admin):
+    with app.app_context():
+        few = add_user()
+        many = add_user()
+        add_orders(few, 2)
+        add_orders(many, 40, lines=6)
+        database.session.commit()
+
+    assert count_queries(app, client, '/user/orders', auth_header(app, few)) == 2
+    assert count_queries(app, client, '/user/orders', auth_header(app, many)) == 2
+
+
+@pytest.mark.parametrize('batch_size, batches', [(10, 5), (1000, 1)])
+def test_orders_export_queries_grow_with_batches_not_rows(app, client, database, admin, batch_size, batches):
+    with app.app_context():
+        add_orders(add_user(), 50)
+        database.session.commit()
+    app.config['EXPORT_BATCH_SIZE'] = batch_size
+    try:
+        queries = count_queries(app, client, '/admin/orders/export', admin)
+    finally:
+        app.config['EXPORT_BATCH_SIZE'] = 1000
+
+    # page + lines per batch, then one empty page that ends the stream
+    assert queries == 2 * batches + 1
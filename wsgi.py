@@ -0,0 +1,5 @@
+from app import create_app, warm_up
+
+# imported once by the uWSGI master; workers are forked from the warmed app
+app = create_app()
+warm_up(app)